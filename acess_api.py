@@ -4,40 +4,97 @@ import os
 import time
 import re
 import csv
+import hashlib
 import sys
 import pickle
+import threading
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import torch
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from datetime import datetime, timedelta
 from sentence_transformers import SentenceTransformer, util
 
+import cache_http
+import config
+import duplicatas
+import fonte_senado
+import inteiro_teor
+import metricas
+from diretorio_deputados import DiretorioDeputados, legislaturas_do_periodo
+
 # =============================================================================
 # 1. CONFIGURAÇÕES GERAIS
 # =============================================================================
 CAMARA_BASE_URL = "https://dadosabertos.camara.leg.br/api/v2"
+SENADO_BASE_URL = "https://legis.senado.leg.br/dadosabertos"
+
+# Casas coletadas (em paralelo) e gravadas no mesmo banco, identificadas pela coluna "Casa"
+FONTES_ATIVAS = ["camara", "senado"]
 
 # Configuração de Datas para Coleta
 # Ajuste DATA_INICIO_COLETA conforme necessário para o histórico desejado
 DATA_INICIO_COLETA = datetime(2023, 1, 1) 
 DATA_FIM_COLETA = datetime.now()
 TIPOS_DOCUMENTO = ["PL", "PLP", "PEC"]
+# Atualização incremental: recoleta a partir da última apresentação menos esta margem
+# (proposições publicadas com atraso e mudanças recentes de situação)
+JANELA_REVISAO_DIAS = 7
+# Proposições antigas também mudam (situação, tramitação): a Câmara informa quais
+# tramitaram desde a última revisão; no Senado, as matérias ainda não encerradas
+# são relidas no máximo uma vez a cada REVISAO_SENADO_HORAS
+REVISAO_SENADO_HORAS = 24
 
 # Configuração de Busca e Filtro
 CONSULTA_USUARIO = "Regulamentação inteligência artificial e algoritmos"
 MODELO_NOME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-PESO_SEMANTICO = 0.5
-PESO_KEYWORD = 0.5    
-FILTRO_THRESHOLD = 0.45
+PESO_SEMANTICO = config.PESO_SEMANTICO
+PESO_KEYWORD = config.PESO_KEYWORD
+FILTRO_THRESHOLD = config.FILTRO_THRESHOLD
+PISO_CANDIDATOS = config.PISO_CANDIDATOS  # Scores brutos gravados para todos acima do piso
+TAMANHO_BLOCO_FILTRAGEM = 2048  # Registros por bloco na filtragem (define o pico de memória)
 
 # Nomes de Arquivos (Internos e de Saída)
 NOME_ARQUIVO_BANCO_DADOS = "camara_db_completo_cache.json"
+NOME_ARQUIVO_BANCO_DADOS_SENADO = "senado_db_completo_cache.json"
 NOME_ARQUIVO_CACHE_IDS = "temp_lista_ids.json"
+NOME_ARQUIVO_DIRETORIO_DEPUTADOS = "diretorio_deputados.json"
+NOME_ARQUIVO_ESTADO_ATUALIZACAO = "atualizacao_fontes.json"  # última revisão de tramitação por casa
 NOME_ARQUIVO_PKL = "keywords_embeddings.pkl"
 ARQUIVO_CACHE_EMB = "cache_ementas_paraphrase.npy"
+ARQUIVO_CACHE_EMB_CHAVES = "cache_ementas_paraphrase_chaves.json"  # hash da ementa de cada linha do .npy
+PASTA_INTEIRO_TEOR = "cache_inteiro_teor"  # textos completos e embeddings dos trechos (config.INTEIRO_TEOR_ATIVO)
 
-# IMPORTANTE: Este nome deve ser o mesmo que o main.py espera mover
+# IMPORTANTE: Estes nomes devem ser os mesmos que o main.py espera mover
+NOME_ARQUIVO_SAIDA_FINAL = "proposicoes_camara_resumo.parquet"
 NOME_ARQUIVO_SAIDA_FINAL_CSV = "proposicoes_camara_resumo.csv"
+ARQUIVO_SAIDA_PARCIAL = NOME_ARQUIVO_SAIDA_FINAL + ".parcial"  # candidatos da varredura, antes dos grupos de duplicatas
+EXPORTAR_CSV = False  # CSV é apenas uma exportação opcional; o insert_data.py lê o Parquet
+
+# Esquema tipado do arquivo de saída (datas e scores em tipos nativos)
+ESQUEMA_SAIDA = pa.schema([
+    ("Norma", pa.string()),
+    ("Casa", pa.string()),
+    ("Similaridade Semantica", pa.float64()),
+    ("Score Semantico", pa.float64()),
+    ("Boost Keyword", pa.float64()),
+    ("Score Inteiro Teor", pa.float64()),
+    ("Descricao da Sigla", pa.string()),
+    ("Data de Apresentacao", pa.date32()),
+    ("Autor", pa.string()),
+    ("Partido", pa.string()),
+    ("Ementa", pa.string()),
+    ("Link Documento PDF", pa.string()),
+    ("Link Página Web", pa.string()),
+    ("Indexacao", pa.string()),
+    ("Último Estado", pa.string()),
+    ("Data Último Estado", pa.date32()),
+    ("Situação", pa.string()),
+    ("Grupo Duplicatas", pa.string()),
+])
 
 # =============================================================================
 # 2. UTILITÁRIOS LEGISLATIVOS (Integrado do utils_legislativo.py)
@@ -108,6 +165,14 @@ def limpar_ementa_para_vetorizacao(texto):
     
     return texto
 
+def converter_data(texto):
+    """Converte 'YYYY-MM-DD...' em date; retorna None se vazio ou inválido."""
+    if not texto: return None
+    try:
+        return datetime.strptime(texto[:10], '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        return None
+
 def limpar_texto_basico(texto):
     """Função leve usada apenas para limpeza simples (busca BM25/Keywords)."""
     if not texto: return ""
@@ -131,10 +196,19 @@ def carregar_json(nome_arquivo):
         with open(nome_arquivo, 'r', encoding='utf-8') as f: return json.load(f)
     except: return None
 
-def obter_lista_ids(session, base_url, dt_inicio, dt_fim, tipos):
+def criar_sessao():
+    """Session com cache HTTP persistente (revalidação condicional) e métricas."""
+    session = requests.Session()
+    cache_http.instalar_cache(session)
+    return metricas.instrumentar_sessao(session)
+
+def obter_lista_ids(session, base_url, dt_inicio, dt_fim, tipos, por_tramitacao=False):
+    """IDs apresentados no período ou, com por_tramitacao, que tramitaram no período."""
     proposicoes = []
     curr = dt_inicio
-    print(f"\n[COLETA] Buscando IDs de {dt_inicio.date()} até {dt_fim.date()}...", flush=True)
+    campo_ini, campo_fim = ("dataInicio", "dataFim") if por_tramitacao else ("dataApresentacaoInicio", "dataApresentacaoFim")
+    print(f"\n[COLETA] Buscando IDs de {dt_inicio.date()} até {dt_fim.date()}"
+          f"{' (tramitação)' if por_tramitacao else ''}...", flush=True)
 
     while curr < dt_fim:
         next_date = curr + timedelta(days=60) # Blocos de 60 dias para evitar timeout
@@ -145,8 +219,8 @@ def obter_lista_ids(session, base_url, dt_inicio, dt_fim, tipos):
         
         url = f"{base_url}/proposicoes"
         params = {
-            "dataApresentacaoInicio": dt_ini_str,
-            "dataApresentacaoFim": dt_fim_str,
+            campo_ini: dt_ini_str,
+            campo_fim: dt_fim_str,
             "siglaTipo": ",".join(tipos),
             "itens": 100, "ordem": "ASC", "ordenarPor": "id"
         }
@@ -172,7 +246,8 @@ def obter_lista_ids(session, base_url, dt_inicio, dt_fim, tipos):
 
 def executar_coleta_completa():
     ids_salvos = carregar_json(NOME_ARQUIVO_CACHE_IDS)
-    session = requests.Session()
+    session = criar_sessao()
+    inicio_coleta = time.perf_counter()
     
     # 1. Obter IDs (se não existir cache ou se quiser forçar atualização)
     if not ids_salvos:
@@ -181,8 +256,20 @@ def executar_coleta_completa():
     else:
         print(f"[CACHE] Usando lista de IDs existente: {len(ids_salvos)} itens.", flush=True)
 
-    # 2. Obter Detalhes + Cache Partidário
-    cache_partidos = {}
+    # 2-3. Diretório de Deputados e Detalhes
+    proposicoes_detalhadas, session = obter_detalhes(session, ids_salvos, DATA_INICIO_COLETA, DATA_FIM_COLETA)
+
+    session.close()
+    metricas.registrar_vazao("coleta", len(proposicoes_detalhadas), time.perf_counter() - inicio_coleta)
+    salvar_json(proposicoes_detalhadas, NOME_ARQUIVO_BANCO_DADOS)
+    return proposicoes_detalhadas
+
+def obter_detalhes(session, ids_salvos, dt_inicio, dt_fim):
+    """Detalhes + autoria de cada ID. Retorna (proposições, sessão em uso)."""
+    # Diretório de Deputados (listagem em lote por legislatura, persistido)
+    diretorio = DiretorioDeputados(NOME_ARQUIVO_DIRETORIO_DEPUTADOS)
+    diretorio.atualizar(session, CAMARA_BASE_URL, legislaturas_do_periodo(dt_inicio, dt_fim))
+
     proposicoes_detalhadas = []
     total = len(ids_salvos)
     
@@ -218,18 +305,9 @@ def executar_coleta_completa():
                         autor_nome = principal.get('nome')
                         uri_deputado = principal.get('uri')
 
-                        # Cache de Partido
+                        # Partido pelo diretório (GET individual só se o deputado não estiver nele)
                         if uri_deputado:
-                            if uri_deputado in cache_partidos:
-                                autor_partido = cache_partidos[uri_deputado]
-                            else:
-                                try:
-                                    r_dep = session.get(uri_deputado, timeout=5)
-                                    d_dep = r_dep.json().get('dados', {})
-                                    autor_partido = d_dep.get('ultimoStatus', {}).get('siglaPartido', 'S/P')
-                                    cache_partidos[uri_deputado] = autor_partido
-                                except:
-                                    pass 
+                            autor_partido = diretorio.partido(session, uri_deputado)
                         
                         if len(lista_autores) > 1:
                             coautores = [a.get('nome') for a in lista_autores[1:]]
@@ -244,12 +322,256 @@ def executar_coleta_completa():
         except Exception as e:
             print(f"Erro ID {prop_id}: {e}")
             session.close()
-            session = requests.Session()
+            session = criar_sessao()
             time.sleep(1)
 
-    session.close()
-    salvar_json(proposicoes_detalhadas, NOME_ARQUIVO_BANCO_DADOS)
-    return proposicoes_detalhadas
+    diretorio.salvar()
+    return proposicoes_detalhadas, session
+
+# =============================================================================
+# 3.1 FONTES (ADAPTADORES POR CASA LEGISLATIVA)
+# =============================================================================
+# Cada fonte sabe coletar suas proposições (com cache em JSON próprio) e
+# extrair os metadados de saída. Os registros de todas as fontes seguem o
+# formato da Câmara e recebem o campo 'casa'.
+TRAVA_ESTADO_ATUALIZACAO = threading.Lock()
+
+class FonteLegislativa:
+    chave = ""
+    casa = ""
+    arquivo_cache = ""
+
+    def coletar(self):
+        raise NotImplementedError
+
+    def coletar_periodo(self, dt_inicio, dt_fim):
+        """Proposições apresentadas no período (sem gravar o cache)."""
+        raise NotImplementedError
+
+    def revisar_tramitacao(self, conhecidos, desde):
+        """Relê registros já conhecidos que podem ter mudado desde 'desde'.
+
+        Retorna os registros relidos, ou None se a revisão não foi feita nesta
+        rodada (a data da última revisão não avança).
+        """
+        return None
+
+    def ultima_revisao(self):
+        valor = (carregar_json(NOME_ARQUIVO_ESTADO_ATUALIZACAO) or {}).get(self.chave)
+        return datetime.fromisoformat(valor) if valor else None
+
+    def registrar_revisao(self, momento):
+        # As fontes atualizam em paralelo e dividem o mesmo arquivo
+        with TRAVA_ESTADO_ATUALIZACAO:
+            estado = carregar_json(NOME_ARQUIVO_ESTADO_ATUALIZACAO) or {}
+            estado[self.chave] = momento.isoformat(timespec="seconds")
+            salvar_json(estado, NOME_ARQUIVO_ESTADO_ATUALIZACAO)
+
+    def atualizar_incremental(self):
+        """Acrescenta ao cache o que foi apresentado desde a última coleta.
+
+        Registros que reaparecem na janela de JANELA_REVISAO_DIAS, ou que a
+        fonte indica como alterados desde a última revisão (revisar_tramitacao),
+        são substituídos se mudaram (situação, último estado, autores). Retorna
+        (dados, quantidade de registros novos ou alterados).
+        """
+        agora = datetime.now()
+        dados = carregar_json(self.arquivo_cache)
+        if not dados:
+            dados = self.coletar()
+            novos = len(dados)
+            self.registrar_revisao(agora)
+        else:
+            datas = [d for d in (converter_data(p.get('dataApresentacao', '')) for p in dados) if d]
+            ultima = max(datas) if datas else DATA_INICIO_COLETA.date()
+            dt_inicio = datetime.combine(ultima, datetime.min.time()) - timedelta(days=JANELA_REVISAO_DIAS)
+            dt_inicio = max(dt_inicio, DATA_INICIO_COLETA)
+            print(f"[ATUALIZACAO] {self.casa}: buscando a partir de {dt_inicio.date()}...", flush=True)
+
+            recentes = self.coletar_periodo(dt_inicio, agora)
+            ids_recentes = {p.get('id') for p in recentes}
+            revisados = self.revisar_tramitacao([p for p in dados if p.get('id') not in ids_recentes],
+                                                self.ultima_revisao() or dt_inicio)
+
+            posicao = {p.get('id'): i for i, p in enumerate(dados)}
+            novos = alterados = 0
+            for p in recentes + (revisados or []):
+                p['casa'] = self.casa
+                i = posicao.get(p.get('id'))
+                if i is None:
+                    posicao[p.get('id')] = len(dados)
+                    dados.append(p)
+                    novos += 1
+                elif {**dados[i], 'casa': self.casa} != p:
+                    dados[i] = p
+                    alterados += 1
+            if novos or alterados:
+                salvar_json(dados, self.arquivo_cache)
+            if revisados is not None:
+                self.registrar_revisao(agora)
+            print(f"[ATUALIZACAO] {self.casa}: {novos} novas, {alterados} alteradas.", flush=True)
+            novos += alterados
+
+        metricas.incrementar("oasis_atualizacao_mudancas_total", novos,
+                             "Proposições novas ou alteradas por atualização incremental", casa=self.casa)
+        for p in dados:
+            p['casa'] = self.casa
+        return dados, novos
+
+    def carregar_ou_coletar(self):
+        dados = carregar_json(self.arquivo_cache)
+        if not dados:
+            dados = self.coletar()
+        else:
+            print(f"[DB] {self.casa}: {len(dados)} registros carregados do cache.", flush=True)
+        for p in dados:
+            p['casa'] = self.casa
+        return dados
+
+    def extrair_metadados(self, p):
+        # Tratamento de Autores
+        autor_principal = p.get('autor_principal_nome')
+        coautores = p.get('coautores_nomes')
+        
+        lista_autores = []
+        if autor_principal: lista_autores.append(str(autor_principal))
+        if coautores:
+            if isinstance(coautores, list): lista_autores.extend([str(c) for c in coautores])
+            elif isinstance(coautores, str): lista_autores.append(coautores)
+        
+        autores_finais = list(dict.fromkeys(lista_autores)) # Remove duplicatas
+
+        # Tratamento de Status
+        status = p.get('statusProposicao')
+        ultimo_estado = ""
+        data_ultimo = ""
+        situacao = ""
+        
+        if isinstance(status, dict):
+            ultimo_estado = status.get('descricaoTramitacao', '') or status.get('despacho', '')
+            data_ultimo = status.get('dataHora', '') or status.get('data', '')
+            situacao = status.get('descricaoSituacao', '')
+
+        return {
+            "autores": ", ".join(autores_finais) if autores_finais else "Não informado",
+            "partido": p.get('autor_principal_partido', ''),
+            "ultimo_estado": ultimo_estado,
+            "data_ultimo": data_ultimo,
+            "situacao": situacao
+        }
+
+class FonteCamara(FonteLegislativa):
+    chave = "camara"
+    casa = "Câmara"
+    arquivo_cache = NOME_ARQUIVO_BANCO_DADOS
+
+    def coletar(self):
+        return executar_coleta_completa()
+
+    def coletar_periodo(self, dt_inicio, dt_fim):
+        session = criar_sessao()
+        try:
+            ids = obter_lista_ids(session, CAMARA_BASE_URL, dt_inicio, dt_fim, TIPOS_DOCUMENTO)
+            dados, session = obter_detalhes(session, ids, dt_inicio, dt_fim)
+        finally:
+            session.close()
+        return dados
+
+    def revisar_tramitacao(self, conhecidos, desde):
+        # A listagem filtra por data de tramitação (dataInicio/dataFim)
+        ids_conhecidos = {p.get('id') for p in conhecidos}
+        session = criar_sessao()
+        try:
+            tramitados = obter_lista_ids(session, CAMARA_BASE_URL, desde - timedelta(days=1), datetime.now(),
+                                         TIPOS_DOCUMENTO, por_tramitacao=True)
+            alvo = [item for item in tramitados if item['id'] in ids_conhecidos]
+            print(f"[ATUALIZACAO] {self.casa}: {len(alvo)} proposições antigas tramitaram; relendo...", flush=True)
+            dados, session = obter_detalhes(session, alvo, DATA_INICIO_COLETA, datetime.now())
+        finally:
+            session.close()
+        return dados
+
+class FonteSenado(FonteLegislativa):
+    chave = "senado"
+    casa = "Senado"
+    arquivo_cache = NOME_ARQUIVO_BANCO_DADOS_SENADO
+
+    def coletar(self):
+        inicio = time.perf_counter()
+        dados = self.coletar_periodo(DATA_INICIO_COLETA, DATA_FIM_COLETA)
+        metricas.registrar_vazao("coleta_senado", len(dados), time.perf_counter() - inicio)
+        salvar_json(dados, self.arquivo_cache)
+        return dados
+
+    def coletar_periodo(self, dt_inicio, dt_fim):
+        session = criar_sessao()
+        try:
+            return fonte_senado.coletar_senado(session, SENADO_BASE_URL, dt_inicio, dt_fim, TIPOS_DOCUMENTO)
+        finally:
+            session.close()
+
+    def revisar_tramitacao(self, conhecidos, desde):
+        # A pesquisa do Senado não filtra por tramitação: relê as matérias não encerradas
+        if datetime.now() - desde < timedelta(hours=REVISAO_SENADO_HORAS):
+            return None
+        alvo = [p for p in conhecidos if fonte_senado.em_tramitacao(p)]
+        print(f"[ATUALIZACAO] {self.casa}: relendo {len(alvo)} matérias em tramitação...", flush=True)
+        session = criar_sessao()
+        try:
+            return fonte_senado.revisar_materias(session, SENADO_BASE_URL, alvo)
+        finally:
+            session.close()
+
+FONTES = {fonte.chave: fonte for fonte in (FonteCamara(), FonteSenado())}
+FONTES_POR_CASA = {fonte.casa: fonte for fonte in FONTES.values()}
+
+def fontes_ativas():
+    return [FONTES[chave] for chave in FONTES_ATIVAS]
+
+def carregar_corpus_local(fontes=None):
+    """Corpus já coletado (caches JSON), na mesma ordem de coletar_fontes(), sem acessar a rede."""
+    db_dados = []
+    for fonte in fontes or fontes_ativas():
+        dados = carregar_json(fonte.arquivo_cache) or []
+        for p in dados:
+            p['casa'] = fonte.casa
+        db_dados.extend(dados)
+    return db_dados
+
+def coletar_fontes(fontes=None):
+    """Coleta (ou carrega do cache) todas as fontes em paralelo; a ordem do resultado é fixa."""
+    fontes = fontes or fontes_ativas()
+
+    def coletar(fonte):
+        try:
+            return fonte.carregar_ou_coletar()
+        except Exception as e:
+            # Uma casa fora do ar não impede a análise da outra
+            print(f"[ERRO] Falha na coleta de {fonte.casa}: {e}", flush=True)
+            return []
+
+    with ThreadPoolExecutor(max_workers=len(fontes)) as executor:
+        lotes = list(executor.map(coletar, fontes))
+    return [p for lote in lotes for p in lote]
+
+def atualizar_fontes(fontes=None):
+    """Atualização incremental de todas as fontes em paralelo. Retorna (dados, mudanças)."""
+    fontes = fontes or fontes_ativas()
+
+    def atualizar(fonte):
+        try:
+            return fonte.atualizar_incremental()
+        except Exception as e:
+            # Mantém o que já estava em cache; a próxima rodada tenta de novo
+            print(f"[ERRO] Falha na atualização de {fonte.casa}: {e}", flush=True)
+            dados = carregar_json(fonte.arquivo_cache) or []
+            for p in dados:
+                p['casa'] = fonte.casa
+            return dados, 0
+
+    with ThreadPoolExecutor(max_workers=len(fontes)) as executor:
+        resultados = list(executor.map(atualizar, fontes))
+    return [p for dados, _ in resultados for p in dados], sum(novos for _, novos in resultados)
 
 # =============================================================================
 # 4. MÓDULO DE KEYWORDS (Lógica do gerador_keywords.py)
@@ -274,7 +596,9 @@ def gerar_keywords_embeddings(db_dados, model):
     lista_keywords = sorted(list(unique_keywords))
     
     # Vetorização
+    inicio = time.perf_counter()
     embeddings = model.encode(lista_keywords, batch_size=64, show_progress_bar=True, convert_to_tensor=True)
+    metricas.registrar_vazao("encoding_keywords", len(lista_keywords), time.perf_counter() - inicio)
     
     dados_pkl = {"keywords_texto": lista_keywords, "keywords_vectors": embeddings.cpu()}
     with open(NOME_ARQUIVO_PKL, "wb") as f:
@@ -286,151 +610,354 @@ def gerar_keywords_embeddings(db_dados, model):
 # 5. MÓDULO FILTRADOR (Lógica do filtrador_v3_final.py)
 # =============================================================================
 def extrair_metadados_para_csv(p):
-    # Tratamento de Autores
-    autor_principal = p.get('autor_principal_nome')
-    coautores = p.get('coautores_nomes')
-    
-    lista_autores = []
-    if autor_principal: lista_autores.append(str(autor_principal))
-    if coautores:
-        if isinstance(coautores, list): lista_autores.extend([str(c) for c in coautores])
-        elif isinstance(coautores, str): lista_autores.append(coautores)
-    
-    autores_finais = list(dict.fromkeys(lista_autores)) # Remove duplicatas
-
-    # Tratamento de Status
-    status = p.get('statusProposicao')
-    ultimo_estado = ""
-    data_ultimo = ""
-    situacao = ""
-    
-    if isinstance(status, dict):
-        ultimo_estado = status.get('descricaoTramitacao', '') or status.get('despacho', '')
-        data_ultimo = status.get('dataHora', '') or status.get('data', '')
-        situacao = status.get('descricaoSituacao', '')
-
-    return {
-        "autores": ", ".join(autores_finais) if autores_finais else "Não informado",
-        "partido": p.get('autor_principal_partido', ''),
-        "ultimo_estado": ultimo_estado,
-        "data_ultimo": data_ultimo,
-        "situacao": situacao
-    }
-
-def executar_filtragem(db, kw_data, model):
-    print(f"\n[FILTRO] Iniciando busca híbrida: '{CONSULTA_USUARIO}'", flush=True)
-    
-    # A) Prepara Embeddings das Ementas (Cache)
-    if os.path.exists(ARQUIVO_CACHE_EMB) and os.path.getsize(ARQUIVO_CACHE_EMB) > 0:
-        try:
-            embs_ementas = np.load(ARQUIVO_CACHE_EMB)
-            # Verifica se o tamanho do cache bate com o DB atual
-            if len(embs_ementas) != len(db): 
-                raise ValueError("Tamanho do cache diferente do DB")
-            print(" -> Cache de ementas carregado.", flush=True)
-        except:
-            print(" -> Gerando embeddings das ementas (Atualizando)...", flush=True)
-            textos = [limpar_ementa_para_vetorizacao(p.get('ementa', '')) for p in db]
-            embs_ementas = model.encode(textos, batch_size=32, show_progress_bar=True)
-            np.save(ARQUIVO_CACHE_EMB, embs_ementas)
-    else:
-        print(" -> Gerando embeddings das ementas (Primeira vez)...", flush=True)
-        textos = [limpar_ementa_para_vetorizacao(p.get('ementa', '')) for p in db]
-        embs_ementas = model.encode(textos, batch_size=32, show_progress_bar=True)
-        np.save(ARQUIVO_CACHE_EMB, embs_ementas)
-
-    # B) Prepara Embeddings da Query e Keywords Boost
-    emb_query = model.encode(limpar_ementa_para_vetorizacao(CONSULTA_USUARIO), convert_to_tensor=True)
+    fonte = FONTES_POR_CASA.get(p.get('casa'), FONTES["camara"])
+    return fonte.extrair_metadados(p)
+
+def blocos(iteravel, tamanho):
+    """Divide qualquer iterável em listas de até 'tamanho' itens, sem materializá-lo."""
+    iterador = iter(iteravel)
+    while True:
+        bloco = list(islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+def chave_ementa(p):
+    """Identifica o texto embedado de um registro (independe da posição no corpus)."""
+    return hashlib.sha1((p.get('ementa') or '').encode('utf-8')).hexdigest()[:16]
+
+def carregar_cache_embeddings():
+    """(matriz mmap, chaves por linha) do cache, ou (None, None) se ausente/inconsistente."""
+    if not (os.path.exists(ARQUIVO_CACHE_EMB) and os.path.getsize(ARQUIVO_CACHE_EMB) > 0):
+        return None, None
+    chaves = carregar_json(ARQUIVO_CACHE_EMB_CHAVES)
+    try:
+        # mmap: nada é lido do disco além do cabeçalho até as fatias serem usadas
+        embs = np.load(ARQUIVO_CACHE_EMB, mmap_mode='r')
+    except (OSError, ValueError):
+        return None, None
+    if not chaves or len(chaves) != embs.shape[0]:
+        return None, None
+    return embs, chaves
+
+def cache_embeddings_valido(db):
+    _, chaves = carregar_cache_embeddings()
+    return chaves is not None and chaves == [chave_ementa(p) for p in db]
+
+def embeddings_por_bloco(db, model, tamanho_bloco):
+    """Gera (registros, embeddings) por bloco.
+
+    Se o cache corresponde exatamente ao corpus, as fatias vêm do .npy mapeado
+    em memória. Caso contrário, um novo .npy é montado bloco a bloco com
+    open_memmap: ementas já conhecidas (pela chave) são copiadas do cache antigo
+    e só as novas são codificadas, de modo que uma atualização incremental
+    paga apenas pelas proposições novas. O cache é substituído no final.
+    """
+    total = len(db)
+    chaves = [chave_ementa(p) for p in db]
+    anterior, chaves_anteriores = carregar_cache_embeddings()
+
+    if chaves_anteriores == chaves:
+        print(" -> Cache de ementas carregado (mmap).", flush=True)
+        metricas.registrar_cache("embeddings_ementas", True)
+        for inicio, lote in zip(range(0, total, tamanho_bloco), blocos(db, tamanho_bloco)):
+            yield lote, np.asarray(anterior[inicio:inicio + len(lote)])
+        return
+
+    metricas.registrar_cache("embeddings_ementas", False)
+    linha_anterior = {c: i for i, c in enumerate(chaves_anteriores or [])}
+    print(f" -> Gerando embeddings das ementas por bloco ({len(linha_anterior)} no cache)...", flush=True)
+
+    temporario = ARQUIVO_CACHE_EMB + ".tmp"
+    destino = np.lib.format.open_memmap(temporario, mode='w+', dtype=np.float32,
+                                        shape=(total, model.get_sentence_embedding_dimension()))
+    inicio_encoding = time.perf_counter()
+    inicio = 0
+    codificados = 0
+    for lote in blocos(db, tamanho_bloco):
+        chaves_lote = chaves[inicio:inicio + len(lote)]
+        embs_lote = np.empty((len(lote), destino.shape[1]), dtype=np.float32)
+        faltantes = [j for j, c in enumerate(chaves_lote) if c not in linha_anterior]
+        conhecidos = [j for j, c in enumerate(chaves_lote) if c in linha_anterior]
+        if conhecidos:
+            embs_lote[conhecidos] = anterior[[linha_anterior[chaves_lote[j]] for j in conhecidos]]
+        if faltantes:
+            embs_lote[faltantes] = codificar_ementas([lote[j] for j in faltantes], model)
+            codificados += len(faltantes)
+        destino[inicio:inicio + len(lote)] = embs_lote
+        inicio += len(lote)
+        yield lote, embs_lote
+
+    destino.flush()
+    del destino, anterior  # libera os mmaps antes de substituir os arquivos
+    # Sem chaves o cache é inválido: uma interrupção aqui nunca associa chaves antigas à matriz nova
+    if os.path.exists(ARQUIVO_CACHE_EMB_CHAVES):
+        os.remove(ARQUIVO_CACHE_EMB_CHAVES)
+    os.replace(temporario, ARQUIVO_CACHE_EMB)
+    salvar_json(chaves, ARQUIVO_CACHE_EMB_CHAVES)
+    print(f" -> {codificados} ementas codificadas, {total - codificados} reaproveitadas do cache.", flush=True)
+    metricas.registrar_vazao("encoding_ementas", codificados, time.perf_counter() - inicio_encoding)
+
+def codificar_ementas(db, model):
+    textos = [limpar_ementa_para_vetorizacao(p.get('ementa', '')) for p in db]
+    return model.encode(textos, batch_size=32, show_progress_bar=False)
+
+def identificar_tags_alvo(emb_query, kw_data):
     scores_kw = util.cos_sim(emb_query, kw_data['keywords_vectors'])[0]
-    top_kw = torch.topk(scores_kw, k=30)
-    
+    top_kw = torch.topk(scores_kw, k=min(30, len(kw_data['keywords_texto'])))
+
     tags_alvo = []
     for sc, idx in zip(top_kw.values, top_kw.indices):
         if float(sc) > 0.65:
             tags_alvo.append(kw_data['keywords_texto'][idx])
+    return tags_alvo
+
+def texto_tags(p):
+    """Keywords + indexação com limpeza simples, no formato comparado com as tags."""
+    raw_tags = (p.get('keywords') or '') + ' ' + (p.get('indexacao') or '')
+    return limpar_texto_basico(raw_tags).upper()
+
+def boost_keyword(p_tags_upper, tags_alvo):
+    # Boost se tiver tag relevante
+    for tag in tags_alvo:
+        if tag in p_tags_upper:
+            return 1.0
+    return 0.0
+
+def score_hibrido(score_sem, score_boost, peso_semantico=None, peso_keyword=None):
+    """Fórmula da busca híbrida (aceita escalares ou arrays numpy); pesos padrão do config."""
+    peso_semantico = PESO_SEMANTICO if peso_semantico is None else peso_semantico
+    peso_keyword = PESO_KEYWORD if peso_keyword is None else peso_keyword
+    return (score_sem * peso_semantico) + (score_boost * peso_keyword)
+
+def score_semantico_final(score_ementa, score_teor):
+    """Com o inteiro teor, vale o maior entre a ementa e o melhor trecho do texto."""
+    return score_ementa if score_teor is None else max(score_ementa, score_teor)
+
+def eh_candidato(score_sem, score_boost):
+    return score_sem >= PISO_CANDIDATOS or score_boost > 0
+
+def pontuar_blocos(blocos_embs, emb_query, tags_alvo, candidatos=None):
+    """Gera (proposição, score semântico, boost) para cada candidato acima do piso.
+
+    O corte por FILTRO_THRESHOLD não é feito aqui: os scores brutos vão para o
+    banco e o dashboard refiltra com qualquer peso/threshold. Se 'candidatos'
+    for uma lista, recebe a linha (no corpus) de cada candidato gerado.
+    """
+    linha = 0
+    for lote, embs_lote in blocos_embs:
+        sim_scores = util.cos_sim(emb_query, embs_lote)[0].cpu().numpy()
+
+        for p, score_sem in zip(lote, sim_scores):
+            score_sem = float(score_sem)
+            score_boost = boost_keyword(texto_tags(p), tags_alvo)
+            if eh_candidato(score_semantico_final(score_sem, p.get('score_inteiro_teor')), score_boost):
+                if candidatos is not None:
+                    candidatos.append(linha)
+                yield p, score_sem, score_boost
+            linha += 1
+
+def formatar_linhas(selecionados):
+    """Formatação da saída (tipos nativos: float para score, date para datas).
+
+    O grupo de duplicatas só é conhecido depois da varredura e é preenchido
+    por completar_linhas.
+    """
+    for p, score_sem, score_boost in selecionados:
+        meta = extrair_metadados_para_csv(p)
+        score_teor = p.get('score_inteiro_teor')
+        yield {
+            "Norma": f"{p.get('siglaTipo')} {p.get('numero')}/{p.get('ano')}",
+            "Casa": p.get('casa', FONTES["camara"].casa),
+            "Similaridade Semantica": round(score_hibrido(score_semantico_final(score_sem, score_teor), score_boost), 4),
+            "Score Semantico": round(score_sem, 4),
+            "Boost Keyword": score_boost,
+            "Score Inteiro Teor": None if score_teor is None else round(score_teor, 4),
+            "Descricao da Sigla": p.get('descricaoTipo', p.get('siglaTipo', '')),
+            "Data de Apresentacao": converter_data(p.get('dataApresentacao', '')),
+            "Autor": meta['autores'],
+            "Partido": meta['partido'],
+            "Ementa": p.get('ementa', '').strip(),
+            "Link Documento PDF": p.get('urlInteiroTeor', ''),
+            "Link Página Web": p.get('url_pagina_web_oficial', ''),
+            "Indexacao": p.get('keywords', p.get('indexacao', '')),
+            "Último Estado": meta['ultimo_estado'],
+            "Data Último Estado": converter_data(meta['data_ultimo']),
+            "Situação": meta['situacao'],
+            "Grupo Duplicatas": None
+        }
 
-    print(f" -> Tags de Boost identificadas: {tags_alvo[:5]}...", flush=True)
+def completar_linhas(grupos, tamanho_bloco):
+    """Relê a saída parcial da varredura preenchendo o grupo de duplicatas ('grupos', na ordem da saída)."""
+    arquivo = pq.ParquetFile(ARQUIVO_SAIDA_PARCIAL)
+    posicao = 0
+    try:
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco):
+            for linha in lote.to_pylist():
+                linha["Grupo Duplicatas"] = grupos[posicao]
+                posicao += 1
+                yield linha
+    finally:
+        arquivo.close()
+
+def gravar_saida(linhas, tamanho_bloco, parcial=False):
+    """Grava as linhas no Parquet (e CSV opcional) à medida que chegam.
+
+    Os arquivos são escritos em '.tmp' e só substituem a saída anterior quando
+    terminam; sem resultados, nada é gravado. Com 'parcial', grava só o Parquet
+    da varredura em ARQUIVO_SAIDA_PARCIAL. Retorna o total de linhas.
+    """
+    tmp_parquet = ARQUIVO_SAIDA_PARCIAL if parcial else NOME_ARQUIVO_SAIDA_FINAL + ".tmp"
+    tmp_csv = NOME_ARQUIVO_SAIDA_FINAL_CSV + ".tmp"
+    exportar_csv = EXPORTAR_CSV and not parcial
+    writer = None
+    arquivo_csv = writer_csv = None
+    total = 0
+    try:
+        for lote in blocos(linhas, tamanho_bloco):
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_parquet, ESQUEMA_SAIDA)
+                if exportar_csv:
+                    arquivo_csv = open(tmp_csv, 'w', newline='', encoding='utf-8')
+                    writer_csv = csv.writer(arquivo_csv, delimiter=',')
+                    writer_csv.writerow(ESQUEMA_SAIDA.names)
+            writer.write_table(pa.Table.from_pylist(lote, schema=ESQUEMA_SAIDA))
+            if writer_csv:
+                for linha in lote:
+                    writer_csv.writerow(['' if linha[c] is None else linha[c] for c in ESQUEMA_SAIDA.names])
+            if total == 0 and parcial:
+                print(f" -> Primeiros {len(lote)} resultados gravados em '{tmp_parquet}'.", flush=True)
+            total += len(lote)
+    finally:
+        if writer:
+            writer.close()
+        if arquivo_csv:
+            arquivo_csv.close()
+
+    if total and not parcial:
+        os.replace(tmp_parquet, NOME_ARQUIVO_SAIDA_FINAL)
+        if exportar_csv:
+            os.replace(tmp_csv, NOME_ARQUIVO_SAIDA_FINAL_CSV)
+            print(f"[EXPORT] CSV opcional salvo em '{NOME_ARQUIVO_SAIDA_FINAL_CSV}'.", flush=True)
+    return total
+
+def agrupar_duplicatas(db, indice_lsh, candidatos):
+    """Id do grupo de quase duplicatas de cada candidato (assinaturas já feitas na varredura)."""
+    # Após a varredura o cache corresponde ao corpus; só membros de baldes com colisão são lidos
+    embs, _ = carregar_cache_embeddings()
+    raizes = indice_lsh.agrupar(embs)
+    del embs
+    return duplicatas.ids_de_grupo(db, raizes, candidatos)
+
+def marcar_inteiro_teor(db, model, emb_query):
+    """Preenche p['score_inteiro_teor'] com o melhor trecho do texto completo (etapa opcional)."""
+    if not config.INTEIRO_TEOR_ATIVO or not db:
+        return
+    if not inteiro_teor.extrator_pdf_disponivel():
+        print("[INTEIRO TEOR] pypdf não está instalado; etapa ignorada.", flush=True)
+        return
+
+    print("\n[INTEIRO TEOR] Atualizando textos completos das proposições...", flush=True)
+    cache = inteiro_teor.CacheInteiroTeor(PASTA_INTEIRO_TEOR, MODELO_NOME)
+    # Sessão sem o cache HTTP: os PDFs ficam só no cache de textos (índice próprio)
+    session = metricas.instrumentar_sessao(requests.Session())
+    cache.baixar(session, [p['urlInteiroTeor'] for p in db if p.get('urlInteiroTeor')],
+                 config.INTEIRO_TEOR_DOWNLOADS)
+    cache.codificar(model, limpar_ementa_para_vetorizacao)
+
+    scores = cache.pontuar(emb_query.cpu().numpy())
+    for p in db:
+        url = p.get('urlInteiroTeor')
+        p['score_inteiro_teor'] = scores.get(inteiro_teor.chave_documento(url)) if url else None
+    print(f" -> Inteiro teor pontuado para {sum(p['score_inteiro_teor'] is not None for p in db)} proposições.", flush=True)
+
+def executar_filtragem(db, kw_data, model, tamanho_bloco=None):
+    """Filtragem em fluxo: embeddings -> score -> boost -> formatação -> arquivo, bloco a bloco.
+
+    O pico de memória depende do tamanho do bloco (TAMANHO_BLOCO_FILTRAGEM), não do corpus.
+    A mesma varredura assina os embeddings para o LSH das duplicatas; os grupos
+    são calculados depois e completam a saída.
+    """
+    tamanho_bloco = tamanho_bloco or TAMANHO_BLOCO_FILTRAGEM
+    print(f"\n[FILTRO] Iniciando busca híbrida: '{CONSULTA_USUARIO}'", flush=True)
 
-    # C) Cálculo de Similaridade
-    sim_scores = util.cos_sim(emb_query, embs_ementas)[0].numpy()
-    resultados = []
+    # A) Embeddings da Query e Keywords Boost
+    emb_query = model.encode(limpar_ementa_para_vetorizacao(CONSULTA_USUARIO), convert_to_tensor=True)
+    tags_alvo = identificar_tags_alvo(emb_query, kw_data)
+    print(f" -> Tags de Boost identificadas: {tags_alvo[:5]}...", flush=True)
 
-    for i, p in enumerate(db):
-        score_sem = float(sim_scores[i])
-        score_boost = 0.0
-        
-        # Boost se tiver tag relevante
-        raw_tags = (p.get('keywords') or '') + ' ' + (p.get('indexacao') or '')
-        # Limpeza simples para comparar com tags
-        p_tags_upper = limpar_texto_basico(raw_tags).upper()
-        
-        for tag in tags_alvo:
-            if tag in p_tags_upper:
-                score_boost = 1.0
-                break
-        
-        final_score = (score_sem * PESO_SEMANTICO) + (score_boost * PESO_KEYWORD)
-        
-        if final_score >= FILTRO_THRESHOLD:
-            meta = extrair_metadados_para_csv(p)
-            
-            # Formatação para o CSV
-            resultados.append({
-                "Norma": f"{p.get('siglaTipo')} {p.get('numero')}/{p.get('ano')}",
-                "Similaridade Semantica": f"{final_score:.4f}",
-                "Descricao da Sigla": p.get('descricaoTipo', p.get('siglaTipo', '')),
-                "Data de Apresentacao": p.get('dataApresentacao', '')[:10],
-                "Autor": meta['autores'],
-                "Partido": meta['partido'],
-                "Ementa": p.get('ementa', '').strip(),
-                "Link Documento PDF": p.get('urlInteiroTeor', ''),
-                "Link Página Web": p.get('url_pagina_web_oficial', ''),
-                "Indexacao": p.get('keywords', p.get('indexacao', '')),
-                "Último Estado": meta['ultimo_estado'],
-                "Data Último Estado": meta['data_ultimo'][:10],
-                "Situação": meta['situacao']
-            })
-
-    # D) Salvar CSV
-    if resultados:
-        colunas = list(resultados[0].keys())
-        # IMPORTANTE: Delimitador vírgula para compatibilidade com insert_data.py
-        with open(NOME_ARQUIVO_SAIDA_FINAL_CSV, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=colunas, delimiter=',') 
-            writer.writeheader()
-            writer.writerows(resultados)
-        print(f"\n[SUCESSO] Arquivo '{NOME_ARQUIVO_SAIDA_FINAL_CSV}' gerado com {len(resultados)} linhas.", flush=True)
+    # B) Melhor trecho do inteiro teor (opcional; só documentos novos são baixados e codificados)
+    marcar_inteiro_teor(db, model, emb_query)
+
+    # C) Varredura em blocos (embeddings do cache mmap): score da ementa e
+    #    assinaturas LSH; os candidatos vão direto para a saída parcial
+    inicio = time.perf_counter()
+    indice_lsh = duplicatas.IndiceLSH()
+    candidatos = []
+    blocos_embs = indice_lsh.observar(embeddings_por_bloco(db, model, tamanho_bloco), chave_ementa)
+    selecionados = pontuar_blocos(blocos_embs, emb_query, tags_alvo, candidatos)
+    total = gravar_saida(formatar_linhas(selecionados), tamanho_bloco, parcial=True)
+    metricas.registrar_vazao("filtragem", len(db), time.perf_counter() - inicio)
+
+    if total:
+        # D) Grupos de quase duplicatas (union-find só dentro dos baldes do LSH)
+        grupos = agrupar_duplicatas(db, indice_lsh, candidatos)
+
+        # E) Saída final: a parcial completada substitui a anterior
+        gravar_saida(completar_linhas(grupos, tamanho_bloco), tamanho_bloco)
+        os.remove(ARQUIVO_SAIDA_PARCIAL)
+        print(f"\n[SUCESSO] Arquivo '{NOME_ARQUIVO_SAIDA_FINAL}' gerado com {total} candidatos "
+              f"(score semântico >= {PISO_CANDIDATOS} ou com boost).", flush=True)
     else:
         print("\n[AVISO] Nenhum resultado encontrado com os filtros atuais.", flush=True)
+    return total
 
 # =============================================================================
 # 6. ORQUESTRAÇÃO PRINCIPAL (MAIN)
 # =============================================================================
-if __name__ == "__main__":
-    print("--- INICIANDO SISTEMA UNIFICADO DE COLETA E FILTRAGEM (OASIS) ---", flush=True)
-    
-    # 1. Carrega ou Coleta Dados
-    db_dados = carregar_json(NOME_ARQUIVO_BANCO_DADOS)
-    if not db_dados:
-        db_dados = executar_coleta_completa()
-    else:
-        print(f"[DB] Base de dados carregada: {len(db_dados)} registros.", flush=True)
+def carregar_ou_coletar():
+    """Carrega a base local de proposições ou coleta as fontes ativas (em paralelo)."""
+    db_dados = coletar_fontes()
+    print(f"[DB] Base de dados carregada: {len(db_dados)} registros.", flush=True)
+    return db_dados
 
-    # 2. Prepara Modelo
+def carregar_modelo():
     print(f"\n[MODELO] Carregando {MODELO_NOME}...", flush=True)
-    model = SentenceTransformer(MODELO_NOME)
+    return SentenceTransformer(MODELO_NOME)
 
-    # 3. Gera ou Carrega Keywords
+def carregar_ou_gerar_keywords(db_dados, model):
     kw_data = None
     if os.path.exists(NOME_ARQUIVO_PKL):
         try:
             with open(NOME_ARQUIVO_PKL, 'rb') as f: kw_data = pickle.load(f)
         except: pass
     
+    metricas.registrar_cache("keywords_embeddings", bool(kw_data))
     if not kw_data:
         kw_data = gerar_keywords_embeddings(db_dados, model)
-
-    # 4. Filtra e Exporta CSV
+    return kw_data
+
+def executar_etapa_filtragem(db_dados=None):
+    """Etapa completa de filtragem: modelo + keywords + filtro + Parquet."""
+    if db_dados is None:
+        db_dados = carregar_ou_coletar()
+    model = carregar_modelo()
+    kw_data = carregar_ou_gerar_keywords(db_dados, model)
     executar_filtragem(db_dados, kw_data, model)
+
+if __name__ == "__main__":
+    print("--- INICIANDO SISTEMA UNIFICADO DE COLETA E FILTRAGEM (OASIS) ---", flush=True)
+    
+    metricas.configurar("acess_api")
+
+    # 1. Carrega ou Coleta Dados
+    with metricas.medir_etapa("coleta"):
+        db_dados = carregar_ou_coletar()
+
+    # 2-4. Modelo, Keywords, Filtro e Exportação Parquet
+    with metricas.medir_etapa("filtragem"):
+        executar_etapa_filtragem(db_dados)
+
+    metricas.exportar_prometheus()
     
-    print("\n--- PROCESSO FINALIZADO ---", flush=True)
\ No newline at end of file
+    print("\n--- PROCESSO FINALIZADO ---", flush=True)
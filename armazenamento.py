@@ -0,0 +1,379 @@
+import os
+import re
+import sqlite3
+import time
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+
+import config
+
+# =============================================================================
+# CAMADA DE ARMAZENAMENTO PLUGÁVEL
+# =============================================================================
+# O pipeline (main.py / insert_data.py) e o dashboard.py conversam apenas com
+# um "backend", escolhido por config.DB_BACKEND. Cada backend sabe:
+#   - conectar ao banco;
+#   - recriar o schema a partir do seu arquivo .sql (espelho do create_database.sql);
+#   - inserir lotes Arrow vindos do Parquet;
+#   - executar consultas do dashboard retornando DataFrames;
+#   - traduzir as poucas expressões SQL que mudam entre dialetos;
+#   - publicar uma carga nova sem indisponibilidade: as linhas vão para uma
+#     tabela sombra (Projetos_novo), trocada com a atual por RENAME atômico.
+#     Cada publicação gera uma versão em Atualizacoes, usada pelo dashboard
+#     para invalidar seus caches.
+#
+# O DuckDB trava o arquivo inteiro para um único processo escritor (e
+# nenhum leitor). Por isso a carga dele é montada em um arquivo separado
+# (config.DUCKDB_ARQUIVO_CARGA) e só a cópia + troca de tabelas travam o
+# arquivo principal, em uma transação curta.
+
+
+class BackendArmazenamento:
+    nome = ""
+    placeholder = "?"
+    arquivo_schema = ""
+
+    def conectar(self, com_banco=True, somente_leitura=False):
+        raise NotImplementedError
+
+    def conectar_carga(self):
+        """Conexão onde a tabela sombra é montada (por padrão, o próprio banco)."""
+        return self.conectar()
+
+    # --- Dialeto ---
+    def expr_ano(self, coluna):
+        return f"YEAR({coluna})"
+
+    # --- Schema ---
+    def ler_comandos_schema(self):
+        caminho = os.path.join(config.BASE_DIR, self.arquivo_schema)
+        with open(caminho, "r", encoding="utf-8") as f:
+            sql_script = f.read()
+        return [cmd for cmd in sql_script.split(';') if cmd.strip()]
+
+    def recriar_schema(self):
+        cnx = self.conectar(com_banco=False)
+        try:
+            cursor = cnx.cursor()
+            for command in self.ler_comandos_schema():
+                self.executar_comando_schema(cursor, command)
+            cnx.commit()
+            cursor.close()
+        finally:
+            cnx.close()
+
+    def executar_comando_schema(self, cursor, command):
+        cursor.execute(command)
+
+    # --- Tabela sombra (blue/green) ---
+    def comandos_tabela_sombra(self, tabela):
+        """CREATE TABLE da tabela, lido do arquivo de schema, apontado para a sombra."""
+        padrao = re.compile(rf"\bCREATE\s+TABLE\s+{tabela}\b", re.IGNORECASE)
+        return [padrao.sub(f"CREATE TABLE {tabela}_novo", cmd) for cmd in self.ler_comandos_schema()
+                if padrao.search(cmd)]
+
+    def schema_ausente(self, erro):
+        """O erro indica banco/tabela inexistente (e não uma falha transitória)?"""
+        return False
+
+    def tabela_existe(self, cnx, tabela):
+        cursor = cnx.cursor()
+        try:
+            cursor.execute(f"SELECT 1 FROM {tabela} WHERE 1 = 0")
+            cursor.fetchall()
+            return True
+        except Exception as e:
+            # Conexão perdida, servidor reiniciando etc. não significam tabela ausente
+            if self.schema_ausente(e):
+                return False
+            raise
+        finally:
+            cursor.close()
+
+    def criar_tabela_sombra(self, cnx, tabela):
+        # Uma sombra que sobrou de uma carga interrompida é descartada
+        self.executar(cnx, f"DROP TABLE IF EXISTS {tabela}_novo")
+        for command in self.comandos_tabela_sombra(tabela):
+            self.executar(cnx, command)
+        return f"{tabela}_novo"
+
+    def registrar_versao(self, cnx, linhas):
+        self.executar(cnx, "INSERT INTO Atualizacoes (versao, publicado_em, linhas) "
+                           f"SELECT COALESCE(MAX(versao), 0) + 1, CURRENT_TIMESTAMP, {int(linhas)} FROM Atualizacoes")
+
+    def publicar_tabela_sombra(self, cnx, tabela, linhas):
+        """Troca a tabela atual pela sombra em uma transação (DDL transacional)."""
+        antiga, nova = f"{tabela}_antigo", f"{tabela}_novo"
+        existe = self.tabela_existe(cnx, tabela)
+        self.executar(cnx, f"DROP TABLE IF EXISTS {antiga}")
+        self.executar(cnx, "BEGIN")
+        try:
+            if existe:
+                self.executar(cnx, f"ALTER TABLE {tabela} RENAME TO {antiga}")
+            self.executar(cnx, f"ALTER TABLE {nova} RENAME TO {tabela}")
+            self.registrar_versao(cnx, linhas)
+            self.executar(cnx, "COMMIT")
+        except Exception:
+            self.executar(cnx, "ROLLBACK")
+            raise
+        self.executar(cnx, f"DROP TABLE IF EXISTS {antiga}")
+
+    # --- Carga ---
+    def executar(self, cnx, sql):
+        cursor = cnx.cursor()
+        cursor.execute(sql)
+        cursor.close()
+
+    def sql_insert(self, tabela, colunas):
+        columns = ','.join([f"{self.citar(col)}" for col in colunas])
+        placeholders = ','.join([self.placeholder] * len(colunas))
+        return f"INSERT INTO {tabela} ({columns}) VALUES ({placeholders})"
+
+    def citar(self, coluna):
+        return f'"{coluna}"'
+
+    def erros_integridade(self):
+        return ()
+
+    def inserir_linhas(self, cursor, sql, linhas):
+        """Insere linha a linha, ignorando apenas as linhas com conflito (comportamento original)."""
+        inseridas = 0
+        for values in linhas:
+            try:
+                cursor.execute(sql, values)
+                inseridas += 1
+            except self.erros_integridade():
+                pass
+        return inseridas
+
+    def inserir_lote(self, cnx, tabela, batch):
+        """Insere um pyarrow.RecordBatch cujas colunas já usam os nomes do banco.
+
+        Retorna quantas linhas foram de fato inseridas. Um conflito desfaz só o
+        próprio lote (SAVEPOINT), nunca os lotes anteriores ainda não
+        confirmados; o lote é então refeito linha a linha.
+        """
+        sql = self.sql_insert(tabela, batch.schema.names)
+        linhas = list(zip(*[col.to_pylist() for col in batch.columns]))
+        cursor = cnx.cursor()
+        try:
+            cursor.execute("SAVEPOINT lote")
+            try:
+                cursor.executemany(sql, linhas)
+                inseridas = len(linhas)
+            except self.erros_integridade():
+                cursor.execute("ROLLBACK TO SAVEPOINT lote")
+                inseridas = self.inserir_linhas(cursor, sql, linhas)
+            cursor.execute("RELEASE SAVEPOINT lote")
+        finally:
+            cursor.close()
+        return inseridas
+
+    # --- Consulta ---
+    def consultar(self, query):
+        cnx = self.conectar(somente_leitura=True)
+        try:
+            return pd.read_sql(query, cnx)
+        finally:
+            cnx.close()
+
+
+class BackendMySQL(BackendArmazenamento):
+    nome = "mysql"
+    placeholder = "%s"
+    arquivo_schema = "create_database.sql"
+
+    def conectar(self, com_banco=True, somente_leitura=False):
+        import mysql.connector
+        params = dict(host=config.DB_HOST, user=config.DB_USER, password=config.DB_PASSWORD)
+        if com_banco:
+            params["database"] = config.DB_NAME
+        return mysql.connector.connect(**params)
+
+    def citar(self, coluna):
+        return f"`{coluna}`"
+
+    def erros_integridade(self):
+        import mysql.connector
+        return (mysql.connector.errors.IntegrityError,)
+
+    def schema_ausente(self, erro):
+        import mysql.connector
+        # 1049: Unknown database / 1146: Table doesn't exist
+        return isinstance(erro, mysql.connector.Error) and erro.errno in (1049, 1146)
+
+    def executar_comando_schema(self, cursor, command):
+        import mysql.connector
+        try:
+            cursor.execute(command)
+        except mysql.connector.Error as err:
+            # Ignora erro se tentar apagar banco que não existe
+            if err.errno != 1008:
+                print(f"Erro SQL: {err}")
+                raise err
+
+    def publicar_tabela_sombra(self, cnx, tabela, linhas):
+        antiga, nova = f"{tabela}_antigo", f"{tabela}_novo"
+        self.executar(cnx, f"DROP TABLE IF EXISTS {antiga}")
+        if self.tabela_existe(cnx, tabela):
+            # RENAME TABLE com vários pares é atômico: os leitores veem a tabela antiga ou a nova
+            self.executar(cnx, f"RENAME TABLE {tabela} TO {antiga}, {nova} TO {tabela}")
+        else:
+            self.executar(cnx, f"RENAME TABLE {nova} TO {tabela}")
+        self.registrar_versao(cnx, linhas)
+        cnx.commit()
+        self.executar(cnx, f"DROP TABLE IF EXISTS {antiga}")
+
+
+class BackendDuckDB(BackendArmazenamento):
+    nome = "duckdb"
+    arquivo_schema = "create_database_duckdb.sql"
+    # Segundos esperando o arquivo ser liberado por outro processo
+    espera_leitura = 10
+    espera_escrita = 120
+
+    def conectar(self, com_banco=True, somente_leitura=False, arquivo=None):
+        import duckdb
+        arquivo = arquivo or config.DUCKDB_ARQUIVO
+        if somente_leitura and not os.path.exists(arquivo):
+            somente_leitura = False
+        # O arquivo fica travado enquanto outro processo o usa (dashboard lendo,
+        # atualizador publicando): tenta de novo com espera crescente
+        limite = time.monotonic() + (self.espera_leitura if somente_leitura else self.espera_escrita)
+        espera = 0.05
+        while True:
+            try:
+                return duckdb.connect(arquivo, read_only=somente_leitura)
+            except duckdb.IOException:
+                if time.monotonic() + espera > limite:
+                    raise
+                time.sleep(espera)
+                espera = min(espera * 2, 1.0)
+
+    def conectar_carga(self):
+        # Carga em arquivo próprio: o banco principal segue livre para o dashboard
+        for caminho in (config.DUCKDB_ARQUIVO_CARGA, config.DUCKDB_ARQUIVO_CARGA + ".wal"):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+        cnx = self.conectar(arquivo=config.DUCKDB_ARQUIVO_CARGA)
+        # Sequências usadas pelos DEFAULT da tabela (ex.: seq_projetos_id)
+        for command in self.ler_comandos_schema():
+            if re.search(r"\bCREATE\s+SEQUENCE\b", command, re.IGNORECASE):
+                cnx.execute(command)
+        return cnx
+
+    def publicar_tabela_sombra(self, cnx, tabela, linhas):
+        """Copia a sombra do arquivo de carga e troca as tabelas em uma só transação."""
+        cnx.close()  # o arquivo de carga é anexado abaixo, somente leitura
+        antiga, nova = f"{tabela}_antigo", f"{tabela}_novo"
+        principal = self.conectar()
+        try:
+            principal.execute(f"ATTACH '{config.DUCKDB_ARQUIVO_CARGA}' AS carga (READ_ONLY)")
+            existe = self.tabela_existe(principal, tabela)
+            principal.execute(f"DROP TABLE IF EXISTS {antiga}")
+            principal.execute("BEGIN")
+            try:
+                self.criar_tabela_sombra(principal, tabela)
+                principal.execute(f"INSERT INTO {nova} SELECT * FROM carga.{nova}")
+                if existe:
+                    principal.execute(f"ALTER TABLE {tabela} RENAME TO {antiga}")
+                principal.execute(f"ALTER TABLE {nova} RENAME TO {tabela}")
+                self.registrar_versao(principal, linhas)
+                principal.execute("COMMIT")
+            except Exception:
+                principal.execute("ROLLBACK")
+                raise
+            principal.execute("DETACH carga")
+            principal.execute(f"DROP TABLE IF EXISTS {antiga}")
+        finally:
+            principal.close()
+        os.remove(config.DUCKDB_ARQUIVO_CARGA)
+
+    def erros_integridade(self):
+        import duckdb
+        return (duckdb.ConstraintException,)
+
+    def schema_ausente(self, erro):
+        import duckdb
+        return isinstance(erro, duckdb.CatalogException)
+
+    def executar(self, cnx, sql):
+        cnx.execute(sql)
+
+    def recriar_schema(self):
+        cnx = self.conectar()
+        try:
+            for command in self.ler_comandos_schema():
+                cnx.execute(command)
+        finally:
+            cnx.close()
+
+    def inserir_lote(self, cnx, tabela, batch):
+        # O DuckDB lê o RecordBatch diretamente (sem conversão para objetos Python)
+        colunas = ','.join(self.citar(col) for col in batch.schema.names)
+        cnx.register("lote_arrow", pa.Table.from_batches([batch]))
+        try:
+            cnx.execute(f"INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM lote_arrow")
+            return batch.num_rows
+        except self.erros_integridade():
+            # O INSERT em lote falha inteiro; refaz linha a linha pulando só os conflitos
+            linhas = list(zip(*[col.to_pylist() for col in batch.columns]))
+            return self.inserir_linhas(cnx, self.sql_insert(tabela, batch.schema.names), linhas)
+        finally:
+            cnx.unregister("lote_arrow")
+
+    def consultar(self, query):
+        # Só a publicação (cópia + RENAME) trava o arquivo; conectar() espera por ela
+        cnx = self.conectar(somente_leitura=True)
+        try:
+            return cnx.execute(query).df()
+        finally:
+            cnx.close()
+
+
+class BackendSQLite(BackendArmazenamento):
+    nome = "sqlite"
+    arquivo_schema = "create_database_sqlite.sql"
+
+    def conectar(self, com_banco=True, somente_leitura=False):
+        cnx = sqlite3.connect(config.SQLITE_ARQUIVO, timeout=30)
+        # WAL: leitores (dashboard) não bloqueiam nem são bloqueados pela carga
+        cnx.execute("PRAGMA journal_mode=WAL")
+        return cnx
+
+    def expr_ano(self, coluna):
+        return f"CAST(strftime('%Y', {coluna}) AS INTEGER)"
+
+    def erros_integridade(self):
+        return (sqlite3.IntegrityError,)
+
+    def schema_ausente(self, erro):
+        return isinstance(erro, sqlite3.OperationalError) and "no such table" in str(erro)
+
+
+# Datas são gravadas em ISO (YYYY-MM-DD), permitindo BETWEEN/ORDER BY como texto
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+
+BACKENDS = {
+    "mysql": BackendMySQL,
+    "duckdb": BackendDuckDB,
+    "sqlite": BackendSQLite,
+}
+
+
+def obter_backend(nome=None):
+    """Retorna o backend configurado; usa SQLite se o DuckDB não estiver instalado."""
+    nome = (nome or config.DB_BACKEND).lower()
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend de armazenamento desconhecido: '{nome}'. Opções: {', '.join(BACKENDS)}")
+
+    if nome == "duckdb":
+        try:
+            import duckdb  # noqa: F401
+        except ImportError:
+            print("[AVISO] duckdb não instalado; usando SQLite como backend embutido.")
+            nome = "sqlite"
+
+    return BACKENDS[nome]()
@@ -0,0 +1,133 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import acess_api
+import config
+import insert_data
+import metricas
+from armazenamento import obter_backend
+from main import garantir_estrutura_pastas, mover_saidas_filtragem, obter_caminho
+
+# =============================================================================
+# ATUALIZADOR EM SEGUNDO PLANO (COLETA INCREMENTAL + PUBLICAÇÃO SEM PARADA)
+# =============================================================================
+# Uso (a partir da raiz do projeto, com o dashboard aberto em outro terminal):
+#   python atualizador.py                 # uma rodada a cada ATUALIZACAO_INTERVALO
+#   python atualizador.py --uma-vez       # uma rodada só (ex.: agendador do sistema)
+#
+# A cada rodada:
+#   1. coleta incremental das fontes ativas (só o período desde a última coleta,
+#      mais as proposições antigas cuja tramitação mudou);
+#   2. se algo mudou: filtragem (embeddings já conhecidos vêm do cache) e Parquet;
+#   3. carga na tabela sombra e publicação por RENAME atômico (insert_data.py).
+# O dashboard continua servindo a versão anterior até a troca e percebe a nova
+# versão pela tabela Atualizacoes, sem reiniciar.
+
+
+class Atualizador:
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self.backend = obter_backend()
+        self.model = None
+        self.rodadas = 0
+
+    def garantir_schema(self):
+        """Cria o schema só se o banco/tabelas não existem.
+
+        Qualquer outro erro (ex.: "Too many connections", servidor reiniciando)
+        é repassado: a rodada falha e o dashboard segue com a versão anterior,
+        em vez de o create_database.sql apagar o banco em uso.
+        """
+        try:
+            cnx = self.backend.conectar()
+        except Exception as e:
+            if not self.backend.schema_ausente(e):
+                raise
+            pronto = False  # MySQL sem o banco Oasis
+        else:
+            try:
+                pronto = all(self.backend.tabela_existe(cnx, t) for t in ("Projetos", "Atualizacoes"))
+            finally:
+                cnx.close()
+        if not pronto:
+            print(f"[ATUALIZADOR] Criando schema ({self.backend.arquivo_schema})...", flush=True)
+            self.backend.recriar_schema()
+
+    def executar_rodada(self):
+        self.rodadas += 1
+        print(f"\n[ATUALIZADOR] Rodada {self.rodadas} ({datetime.now():%Y-%m-%d %H:%M:%S})", flush=True)
+
+        with metricas.medir_etapa("atualizacao_coleta"):
+            db_dados, mudancas = acess_api.atualizar_fontes()
+
+        caminho = obter_caminho(os.path.join("projetos_em_csv", acess_api.NOME_ARQUIVO_SAIDA_FINAL))
+        if mudancas == 0 and os.path.exists(caminho) and self.rodadas > 1:
+            print("[ATUALIZADOR] Nenhuma proposição nova ou alterada; nada a publicar.", flush=True)
+            return False
+
+        with metricas.medir_etapa("atualizacao_filtragem"):
+            if self.model is None:
+                self.model = acess_api.carregar_modelo()  # fica carregado entre as rodadas
+            if mudancas:
+                # Indexação das proposições novas pode trazer palavras-chave novas
+                kw_data = acess_api.gerar_keywords_embeddings(db_dados, self.model)
+            else:
+                kw_data = acess_api.carregar_ou_gerar_keywords(db_dados, self.model)
+            acess_api.executar_filtragem(db_dados, kw_data, self.model)
+            mover_saidas_filtragem()
+
+        if not os.path.exists(caminho):
+            print(f"[ATUALIZADOR] {caminho} não existe; nada a publicar.", flush=True)
+            return False
+
+        with metricas.medir_etapa("atualizacao_publicacao"):
+            self.garantir_schema()
+            total = insert_data.carregar_parquet(self.backend, caminho)
+        print(f"[ATUALIZADOR] {total} linhas publicadas em Projetos ({self.backend.nome}).", flush=True)
+        metricas.incrementar("oasis_atualizacao_publicacoes_total", 1, "Publicações feitas pelo atualizador")
+        return True
+
+    def executar(self, uma_vez=False):
+        while True:
+            try:
+                self.executar_rodada()
+            except Exception as e:
+                # Uma rodada com erro não derruba o serviço; o dashboard segue com a versão anterior
+                print(f"[ERRO] Rodada {self.rodadas} falhou: {e}", flush=True)
+                metricas.incrementar("oasis_atualizacao_erros_total", 1, "Rodadas do atualizador com erro")
+            finally:
+                metricas.exportar_prometheus()
+
+            if uma_vez:
+                return
+            print(f"[ATUALIZADOR] Próxima rodada em {self.intervalo}s.", flush=True)
+            time.sleep(self.intervalo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualização periódica do banco do OASIS sem parar o dashboard")
+    parser.add_argument("--intervalo", type=int, default=config.ATUALIZACAO_INTERVALO,
+                        help="Segundos entre rodadas (padrão: OASIS_ATUALIZACAO_INTERVALO)")
+    parser.add_argument("--uma-vez", action="store_true", help="Executa uma única rodada e sai")
+    args = parser.parse_args(argv)
+
+    # Os arquivos de cache do acess_api.py usam caminhos relativos
+    os.chdir(config.BASE_DIR)
+    garantir_estrutura_pastas()
+    metricas.configurar("atualizador")
+
+    # Listagens em cache HTTP não podem ser mais velhas que uma rodada
+    if not config.HTTP_TTL_MAXIMO:
+        config.HTTP_TTL_MAXIMO = args.intervalo
+
+    try:
+        Atualizador(args.intervalo).executar(uma_vez=args.uma_vez)
+    except KeyboardInterrupt:
+        print("\n[ATUALIZADOR] Encerrado.", flush=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
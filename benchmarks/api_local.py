@@ -0,0 +1,278 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode
+
+from benchmarks.corpus_sintetico import CorpusSintetico, ID_ORGAO_INICIAL, ORGAOS
+
+# =============================================================================
+# SERVIDOR LOCAL QUE IMITA A API DE DADOS ABERTOS DA CÂMARA
+# =============================================================================
+# Endpoints (prefixo /api/v2):
+#   /proposicoes                 listagem paginada (dataApresentacaoInicio/Fim, siglaTipo, itens, pagina;
+#                                dataInicio/Fim filtram pela data da última tramitação)
+#   /proposicoes/{id}            detalhe
+#   /proposicoes/{id}/autores    autores
+#   /deputados                   listagem paginada (itens, pagina)
+#   /deputados/{id}              detalhe com ultimoStatus.siglaPartido
+#   /orgaos/{id}                 autores que não são deputados
+#
+# Com um corpus do Senado, também (prefixo /dadosabertos):
+#   /materia/pesquisa/lista.json  pesquisa por sigla e datas (AAAAMMDD), sem paginação
+#   /materia/{codigo}.json        detalhe (IdentificacaoMateria, DadosBasicosMateria, Autoria...)
+#
+# Latência e taxa de erro podem ser injetadas para simular a rede.
+
+PREFIXO = "/api/v2"
+PREFIXO_SENADO = "/dadosabertos"
+
+
+class ManipuladorCamara(BaseHTTPRequestHandler):
+    server_version = "CamaraLocal/1.0"
+
+    def log_message(self, format, *args):
+        pass  # silencioso: o benchmark mede, não loga
+
+    @property
+    def corpus(self):
+        return self.server.corpus
+
+    def absoluto(self, caminho):
+        return f"{self.server.base_url}{caminho}"
+
+    def responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        self.server.contar_requisicao()
+        if self.server.latencia:
+            time.sleep(self.server.latencia)
+        if self.server.taxa_erro and random.random() < self.server.taxa_erro:
+            return self.responder(503, {"status": 503, "title": "Serviço indisponível (simulado)"})
+
+        url = urlparse(self.path)
+        if url.path.startswith(PREFIXO_SENADO):
+            return self.rotear_senado(url)
+        caminho = url.path[len(PREFIXO):] if url.path.startswith(PREFIXO) else url.path
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        partes = [p for p in caminho.split("/") if p]
+
+        try:
+            if partes == ["proposicoes"]:
+                return self.listar_proposicoes(params)
+            if len(partes) == 2 and partes[0] == "proposicoes":
+                return self.detalhe_proposicao(int(partes[1]))
+            if len(partes) == 3 and partes[0] == "proposicoes" and partes[2] == "autores":
+                return self.autores_proposicao(int(partes[1]))
+            if partes == ["deputados"]:
+                return self.listar_deputados(params)
+            if len(partes) == 2 and partes[0] == "deputados":
+                return self.detalhe_deputado(int(partes[1]))
+            if len(partes) == 2 and partes[0] == "orgaos":
+                return self.detalhe_orgao(int(partes[1]))
+        except ValueError:
+            return self.responder(400, {"status": 400, "title": "Parâmetro inválido"})
+        return self.responder(404, {"status": 404, "title": "Recurso não encontrado"})
+
+    # --- Senado ---
+    def rotear_senado(self, url):
+        corpus = self.server.corpus_senado
+        caminho = url.path[len(PREFIXO_SENADO):]
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if corpus is None:
+            return self.responder(404, {"status": 404, "title": "Senado não simulado"})
+
+        try:
+            if caminho == "/materia/pesquisa/lista.json":
+                dt_ini = datetime.strptime(params.get("dataInicioApresentacao", "19000101"), "%Y%m%d")
+                dt_fim = datetime.strptime(params.get("dataFimApresentacao", "29991231"), "%Y%m%d")
+                ini, fim = corpus.faixa_indices(dt_ini, dt_fim)
+                sigla = params.get("sigla")
+                materias = [corpus.materia_senado(i) for i in range(ini, fim)
+                            if sigla is None or corpus.sigla_tipo(i) == sigla]
+                return self.responder(200, {"PesquisaBasicaMateria": {"Materias": {"Materia": materias}}})
+
+            partes = [p for p in caminho.split("/") if p]
+            if len(partes) == 2 and partes[0] == "materia" and partes[1].endswith(".json"):
+                indice = corpus.indice_por_id(int(partes[1][:-len(".json")]))
+                if indice is None:
+                    return self.responder(404, {"status": 404, "title": "Matéria não encontrada"})
+                return self.responder(200, {"DetalheMateria": {"Materia": corpus.materia_senado(indice)}})
+        except ValueError:
+            return self.responder(400, {"status": 400, "title": "Parâmetro inválido"})
+        return self.responder(404, {"status": 404, "title": "Recurso não encontrado"})
+
+    # --- Paginação ---
+    def pagina(self, caminho, params, total, gerar_itens):
+        itens = min(int(params.get("itens", 15)), 100)
+        pagina = max(int(params.get("pagina", 1)), 1)
+        inicio = (pagina - 1) * itens
+        dados = gerar_itens(inicio, min(inicio + itens, total))
+
+        def link(rel, num):
+            return {"rel": rel, "href": self.absoluto(f"{PREFIXO}{caminho}?" + urlencode({**params, "pagina": num, "itens": itens}))}
+
+        ultima = max((total + itens - 1) // itens, 1)
+        links = [link("self", pagina), link("first", 1), link("last", ultima)]
+        if pagina < ultima:
+            links.append(link("next", pagina + 1))
+        if pagina > 1:
+            links.append(link("previous", pagina - 1))
+        return self.responder(200, {"dados": dados, "links": links})
+
+    # --- Proposições ---
+    def listar_proposicoes(self, params):
+        dt_ini = datetime.strptime(params.get("dataApresentacaoInicio", "1900-01-01"), "%Y-%m-%d")
+        dt_fim = datetime.strptime(params.get("dataApresentacaoFim", "2999-12-31"), "%Y-%m-%d")
+        tipos = set(params["siglaTipo"].split(",")) if params.get("siglaTipo") else None
+        ini, fim = self.corpus.faixa_indices(dt_ini, dt_fim)
+
+        indices = self.server.indices_filtrados(ini, fim, tuple(sorted(tipos)) if tipos else None)
+        if params.get("dataInicio") or params.get("dataFim"):
+            # Tramitação no período (O(corpus) por janela: o corpus é gerado sob demanda)
+            tram_ini = params.get("dataInicio", "1900-01-01")
+            tram_fim = params.get("dataFim", "2999-12-31")
+            indices = [i for i in indices
+                       if tram_ini <= self.corpus.proposicao(i)["statusProposicao"]["dataHora"][:10] <= tram_fim]
+
+        def gerar(a, b):
+            itens = []
+            for i in indices[a:b]:
+                r = self.corpus.resumo(i)
+                r["uri"] = self.absoluto(PREFIXO + r["uri"])
+                itens.append(r)
+            return itens
+
+        return self.pagina("/proposicoes", params, len(indices), gerar)
+
+    def detalhe_proposicao(self, prop_id):
+        indice = self.corpus.indice_por_id(prop_id)
+        if indice is None:
+            return self.responder(404, {"status": 404, "title": "Proposição não encontrada"})
+        dados = self.corpus.proposicao(indice)
+        for campo in ("uri", "uriAutores"):
+            dados[campo] = self.absoluto(PREFIXO + dados[campo])
+        dados["urlInteiroTeor"] = self.absoluto(dados["urlInteiroTeor"])
+        return self.responder(200, {"dados": dados, "links": []})
+
+    def autores_proposicao(self, prop_id):
+        indice = self.corpus.indice_por_id(prop_id)
+        if indice is None:
+            return self.responder(404, {"status": 404, "title": "Proposição não encontrada"})
+        autores = self.corpus.autores(indice)
+        for a in autores:
+            a["uri"] = self.absoluto(PREFIXO + a["uri"])
+        return self.responder(200, {"dados": autores, "links": []})
+
+    # --- Deputados / Órgãos ---
+    def listar_deputados(self, params):
+        deputados = self.corpus.deputados
+
+        def gerar(a, b):
+            return [{**d, "uri": self.absoluto(f"{PREFIXO}/deputados/{d['id']}")} for d in deputados[a:b]]
+
+        return self.pagina("/deputados", params, len(deputados), gerar)
+
+    def detalhe_deputado(self, dep_id):
+        d = self.corpus.deputado_por_id(dep_id)
+        if d is None:
+            return self.responder(404, {"status": 404, "title": "Deputado não encontrado"})
+        return self.responder(200, {"dados": {
+            "id": d["id"], "uri": self.absoluto(f"{PREFIXO}/deputados/{d['id']}"),
+            "nomeCivil": d["nome"],
+            "ultimoStatus": {"nome": d["nome"], "siglaPartido": d["siglaPartido"],
+                             "siglaUf": d["siglaUf"], "idLegislatura": d["idLegislatura"]},
+        }, "links": []})
+
+    def detalhe_orgao(self, orgao_id):
+        k = orgao_id - ID_ORGAO_INICIAL
+        if not 0 <= k < len(ORGAOS):
+            return self.responder(404, {"status": 404, "title": "Órgão não encontrado"})
+        return self.responder(200, {"dados": {"id": orgao_id, "nome": ORGAOS[k]}, "links": []})
+
+
+class ServidorCamaraLocal(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, corpus, porta=0, latencia=0.0, taxa_erro=0.0, corpus_senado=None):
+        super().__init__(("127.0.0.1", porta), ManipuladorCamara)
+        self.corpus = corpus
+        self.corpus_senado = corpus_senado
+        self.latencia = latencia
+        self.taxa_erro = taxa_erro
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.total_requisicoes = 0
+        self.trava = threading.Lock()
+        self.cache_indices = {}
+        self.thread = None
+
+    @property
+    def url_api(self):
+        return f"{self.base_url}{PREFIXO}"
+
+    @property
+    def url_senado(self):
+        return f"{self.base_url}{PREFIXO_SENADO}"
+
+    def indices_filtrados(self, ini, fim, tipos):
+        # Cada página da mesma janela reaproveita o filtro por tipo (O(janela) uma vez só)
+        chave = (ini, fim, tipos)
+        with self.trava:
+            if chave in self.cache_indices:
+                return self.cache_indices[chave]
+        if tipos is None:
+            indices = range(ini, fim)
+        else:
+            indices = [i for i in range(ini, fim) if self.corpus.sigla_tipo(i) in tipos]
+        with self.trava:
+            self.cache_indices[chave] = indices
+        return indices
+
+    def contar_requisicao(self):
+        with self.trava:
+            self.total_requisicoes += 1
+
+    def iniciar(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def parar(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API da Câmara")
+    parser.add_argument("--total", type=int, default=1000, help="Número de proposições sintéticas")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latência injetada por requisição (s)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 503 simuladas")
+    parser.add_argument("--total-senado", type=int, default=0, help="Matérias sintéticas do Senado (0 = sem Senado)")
+    args = parser.parse_args()
+
+    corpus_senado = CorpusSintetico(args.total_senado, semente=7) if args.total_senado else None
+    servidor = ServidorCamaraLocal(CorpusSintetico(args.total), args.porta, args.latencia, args.taxa_erro, corpus_senado)
+    print(f"API local em {servidor.url_api} ({args.total} proposições). Ctrl+C para parar.")
+    if corpus_senado:
+        print(f"Senado local em {servidor.url_senado} ({args.total_senado} matérias).")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.server_close()
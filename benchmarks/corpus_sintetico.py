@@ -0,0 +1,230 @@
+import random
+from datetime import datetime, timedelta
+
+# =============================================================================
+# GERADOR DE CORPUS SINTÉTICO DE PROPOSIÇÕES
+# =============================================================================
+# Cada registro é função pura do seu índice (e da semente), então o servidor
+# local consegue servir corpora de 1k a 1M proposições sem mantê-los em memória.
+# Os campos seguem o formato de /proposicoes/{id} da API da Câmara.
+
+ID_INICIAL = 2300000
+ID_DEPUTADO_INICIAL = 200000
+ID_ORGAO_INICIAL = 100
+TOTAL_DEPUTADOS = 600
+
+TIPOS = [("PL", "Projeto de Lei", 0.80), ("PLP", "Projeto de Lei Complementar", 0.12),
+         ("PEC", "Proposta de Emenda à Constituição", 0.08)]
+
+PARTIDOS = ["PL", "PT", "UNIÃO", "PP", "PSD", "MDB", "REPUBLICANOS", "PDT", "PSB",
+            "PSDB", "PSOL", "PODE", "AVANTE", "PCdoB", "NOVO", "CIDADANIA", "PV", "SOLIDARIEDADE"]
+UFS = ["SP", "RJ", "MG", "BA", "RS", "PR", "PE", "CE", "PA", "SC", "GO", "MA", "AM", "ES", "PB", "DF"]
+NOMES = ["Ana", "Carlos", "Fernanda", "José", "Maria", "Paulo", "Luiza", "Ricardo", "Tatiana",
+         "Eduardo", "Juliana", "Marcos", "Renata", "Sérgio", "Patrícia", "Bruno", "Camila", "Diego"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Pereira", "Costa", "Rodrigues", "Almeida",
+              "Nascimento", "Lima", "Araújo", "Fernandes", "Carvalho", "Gomes", "Martins", "Rocha"]
+ORGAOS = ["Poder Executivo", "Senado Federal", "Comissão de Ciência, Tecnologia e Inovação",
+          "Supremo Tribunal Federal", "Ministério Público da União"]
+
+ACOES = ["Dispõe sobre", "Altera a Lei nº {lei}, de {dia} de {mes} de {ano_lei}, para dispor sobre",
+         "Institui política nacional sobre", "Estabelece normas gerais para", "Acrescenta art. {art} à Lei nº {lei}, para prever",
+         "Cria programa nacional voltado para", "Regulamenta"]
+TEMAS_GERAIS = [
+    ("a concessão de benefícios fiscais a microempresas", "MICROEMPRESA, INCENTIVO FISCAL, TRIBUTAÇÃO"),
+    ("o atendimento prioritário a pessoas idosas em serviços de saúde", "IDOSO, SAÚDE PÚBLICA, ATENDIMENTO PRIORITÁRIO"),
+    ("a segurança de barragens de rejeitos de mineração", "BARRAGEM, MINERAÇÃO, SEGURANÇA"),
+    ("a merenda escolar nas escolas públicas de educação básica", "ALIMENTAÇÃO ESCOLAR, EDUCAÇÃO BÁSICA"),
+    ("o porte de arma de fogo por agentes de segurança privada", "ARMA DE FOGO, SEGURANÇA PRIVADA"),
+    ("a proteção de nascentes e matas ciliares", "MEIO AMBIENTE, RECURSOS HÍDRICOS, PRESERVAÇÃO"),
+    ("o combate à violência doméstica contra a mulher", "VIOLÊNCIA DOMÉSTICA, MULHER, LEI MARIA DA PENHA"),
+    ("o transporte rodoviário interestadual de passageiros", "TRANSPORTE RODOVIÁRIO, PASSAGEIRO"),
+    ("o piso salarial dos profissionais de enfermagem", "ENFERMAGEM, PISO SALARIAL, SAÚDE"),
+    ("a renegociação de dívidas rurais de pequenos produtores", "CRÉDITO RURAL, AGRICULTURA FAMILIAR, DÍVIDA"),
+]
+TEMAS_ALVO = [
+    ("o uso de sistemas de inteligência artificial pelo poder público", "INTELIGÊNCIA ARTIFICIAL, ADMINISTRAÇÃO PÚBLICA, TECNOLOGIA"),
+    ("a transparência de algoritmos utilizados em plataformas digitais", "ALGORITMO, PLATAFORMA DIGITAL, TRANSPARÊNCIA"),
+    ("o uso de reconhecimento facial em espaços públicos", "RECONHECIMENTO FACIAL, SEGURANÇA PÚBLICA, DADOS PESSOAIS"),
+    ("a utilização de inteligência artificial na educação básica", "INTELIGÊNCIA ARTIFICIAL, EDUCAÇÃO, ENSINO"),
+    ("a responsabilização por danos causados por decisões automatizadas", "DECISÃO AUTOMATIZADA, RESPONSABILIDADE CIVIL, ALGORITMO"),
+    ("a identificação de conteúdos sintéticos gerados por inteligência artificial", "DEEPFAKE, INTELIGÊNCIA ARTIFICIAL, DESINFORMAÇÃO"),
+]
+MESES = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho", "agosto",
+         "setembro", "outubro", "novembro", "dezembro"]
+SITUACOES = ["Aguardando Designação de Relator", "Aguardando Parecer", "Pronta para Pauta",
+             "Aguardando Deliberação", "Arquivada", "Tramitando em Conjunto", "Transformado em Norma Jurídica"]
+TRAMITACOES = ["Apresentação de Proposição", "Recebimento", "Designação de Relator",
+               "Apensação", "Parecer do Relator", "Arquivamento"]
+
+
+class CorpusSintetico:
+    def __init__(self, total, semente=42, inicio=datetime(2023, 1, 1), fim=datetime(2025, 12, 31),
+                 fracao_tema=0.03, fracao_orgao=0.08):
+        self.total = total
+        self.semente = semente
+        self.inicio = inicio
+        self.fim = fim
+        self.fracao_tema = fracao_tema
+        self.fracao_orgao = fracao_orgao
+        self.deputados = [self.gerar_deputado(k) for k in range(TOTAL_DEPUTADOS)]
+
+    def rng(self, chave):
+        return random.Random(f"{self.semente}:{chave}")
+
+    # --- Índices e datas ---
+    def indice_por_id(self, prop_id):
+        indice = prop_id - ID_INICIAL
+        return indice if 0 <= indice < self.total else None
+
+    def data_por_indice(self, indice):
+        # Datas crescem com o índice: a busca por intervalo vira busca binária
+        span = (self.fim - self.inicio).total_seconds()
+        return self.inicio + timedelta(seconds=span * indice / max(self.total - 1, 1))
+
+    def faixa_indices(self, dt_inicio, dt_fim):
+        """Intervalo [ini, fim) de índices com data de apresentação entre as datas (inclusive)."""
+        def primeiro_com_data_maior_ou_igual(dt):
+            lo, hi = 0, self.total
+            while lo < hi:
+                meio = (lo + hi) // 2
+                if self.data_por_indice(meio) < dt:
+                    lo = meio + 1
+                else:
+                    hi = meio
+            return lo
+        return (primeiro_com_data_maior_ou_igual(dt_inicio),
+                primeiro_com_data_maior_ou_igual(dt_fim + timedelta(days=1)))
+
+    # --- Entidades ---
+    def gerar_deputado(self, k):
+        rng = self.rng(f"dep:{k}")
+        return {
+            "id": ID_DEPUTADO_INICIAL + k,
+            "nome": f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}",
+            "siglaPartido": rng.choice(PARTIDOS),
+            "siglaUf": rng.choice(UFS),
+            "idLegislatura": 57,
+        }
+
+    def deputado_por_id(self, dep_id):
+        k = dep_id - ID_DEPUTADO_INICIAL
+        return self.deputados[k] if 0 <= k < len(self.deputados) else None
+
+    def gerar_tipo(self, rng):
+        x = rng.random()
+        acumulado = 0.0
+        for sigla, descricao, peso in TIPOS:
+            acumulado += peso
+            if x <= acumulado:
+                return sigla, descricao
+        return TIPOS[0][0], TIPOS[0][1]
+
+    def sigla_tipo(self, indice):
+        return self.gerar_tipo(self.rng(f"prop:{indice}"))[0]
+
+    def gerar_ementa(self, rng):
+        alvo = rng.random() < self.fracao_tema
+        tema, keywords = rng.choice(TEMAS_ALVO if alvo else TEMAS_GERAIS)
+        acao = rng.choice(ACOES).format(
+            lei=f"{rng.randint(5, 14)}.{rng.randint(100, 999)}", dia=rng.randint(1, 28),
+            mes=rng.choice(MESES), ano_lei=rng.randint(1990, 2022), art=rng.randint(2, 40))
+        sufixo = rng.choice(["", " e dá outras providências", ", na forma que especifica"])
+        return f"{acao} {tema}{sufixo}.", keywords
+
+    def autores(self, indice):
+        """Lista de autores no formato de /proposicoes/{id}/autores (uri relativa)."""
+        rng = self.rng(f"aut:{indice}")
+        if rng.random() < self.fracao_orgao:
+            k = rng.randrange(len(ORGAOS))
+            return [{"nome": ORGAOS[k], "uri": f"/orgaos/{ID_ORGAO_INICIAL + k}",
+                     "tipo": "Órgão do Poder Executivo", "ordemAssinatura": 1, "proponente": 1}]
+        escolhidos = rng.sample(self.deputados, rng.choice([1, 1, 1, 2, 3, 4]))
+        return [{"nome": d["nome"], "uri": f"/deputados/{d['id']}", "tipo": "Deputado",
+                 "ordemAssinatura": n + 1, "proponente": 1} for n, d in enumerate(escolhidos)]
+
+    def resumo(self, indice):
+        """Item da listagem /proposicoes."""
+        rng = self.rng(f"prop:{indice}")
+        sigla, _ = self.gerar_tipo(rng)
+        data = self.data_por_indice(indice)
+        return {"id": ID_INICIAL + indice, "siglaTipo": sigla, "codTipo": 139,
+                "numero": 1000 + indice % 9000, "ano": data.year,
+                "ementa": self.gerar_ementa(rng)[0], "uri": f"/proposicoes/{ID_INICIAL + indice}"}
+
+    def proposicao(self, indice):
+        """Detalhe no formato de /proposicoes/{id}."""
+        rng = self.rng(f"prop:{indice}")
+        sigla, descricao = self.gerar_tipo(rng)
+        ementa, keywords = self.gerar_ementa(rng)
+        data = self.data_por_indice(indice)
+        prop_id = ID_INICIAL + indice
+        data_status = data + timedelta(days=rng.randint(0, 300))
+        return {
+            "id": prop_id,
+            "uri": f"/proposicoes/{prop_id}",
+            "siglaTipo": sigla,
+            "codTipo": 139,
+            "numero": 1000 + indice % 9000,
+            "ano": data.year,
+            "ementa": ementa,
+            "dataApresentacao": data.strftime("%Y-%m-%dT%H:%M"),
+            "descricaoTipo": descricao,
+            "ementaDetalhada": "",
+            "keywords": keywords,
+            "uriAutores": f"/proposicoes/{prop_id}/autores",
+            "urlInteiroTeor": f"/inteiroteor/{prop_id}.pdf",
+            "statusProposicao": {
+                "dataHora": data_status.strftime("%Y-%m-%dT%H:%M"),
+                "descricaoTramitacao": rng.choice(TRAMITACOES),
+                "descricaoSituacao": rng.choice(SITUACOES),
+                "despacho": "",
+            },
+        }
+
+    def proposicao_coletada(self, indice):
+        """Registro como fica no cache do acess_api.py após a coleta (autores e partido resolvidos)."""
+        dados = self.proposicao(indice)
+        autores = self.autores(indice)
+        principal = autores[0]
+        deputado = self.deputado_por_id(int(principal["uri"].rsplit("/", 1)[-1])) if principal["uri"].startswith("/deputados/") else None
+        dados["url_pagina_web_oficial"] = f"https://www.camara.leg.br/proposicoesWeb/fichadetramitacao?idProposicao={dados['id']}"
+        dados["autor_principal_nome"] = principal["nome"]
+        dados["autor_principal_partido"] = deputado["siglaPartido"] if deputado else "S/P"
+        dados["coautores_nomes"] = [a["nome"] for a in autores[1:]]
+        return dados
+
+    # --- Formato do Senado (/materia/pesquisa/lista e /materia/{codigo}) ---
+    def materia_senado(self, indice):
+        """Matéria no formato "IdentificacaoMateria / DadosBasicosMateria" da API do Senado."""
+        p = self.proposicao(indice)
+        autores = self.autores(indice)
+        autoria = []
+        for a in autores:
+            deputado = self.deputado_por_id(int(a["uri"].rsplit("/", 1)[-1])) if a["uri"].startswith("/deputados/") else None
+            autor = {"NomeAutor": f"Senador {a['nome']}" if deputado else a["nome"],
+                     "SiglaTipoAutor": "SENADOR" if deputado else "ORGAO"}
+            if deputado:
+                autor["IdentificacaoParlamentar"] = {"SiglaPartidoParlamentar": deputado["siglaPartido"],
+                                                     "UfParlamentar": deputado["siglaUf"]}
+            autoria.append(autor)
+        return {
+            "IdentificacaoMateria": {
+                "CodigoMateria": str(p["id"]), "SiglaSubtipoMateria": p["siglaTipo"],
+                "DescricaoSubtipoMateria": p["descricaoTipo"], "NumeroMateria": str(p["numero"]),
+                "AnoMateria": str(p["ano"]),
+            },
+            "DadosBasicosMateria": {
+                "EmentaMateria": p["ementa"], "IndexacaoMateria": p["keywords"],
+                "DataApresentacao": p["dataApresentacao"][:10],
+            },
+            "Autoria": {"Autor": autoria if len(autoria) > 1 else autoria[0]},
+            "SituacaoAtual": {"Autuacoes": {"Autuacao": {
+                "DescricaoLocal": p["statusProposicao"]["descricaoTramitacao"],
+                "Situacao": {"DescricaoSituacao": p["statusProposicao"]["descricaoSituacao"],
+                             "DataSituacao": p["statusProposicao"]["dataHora"][:10]},
+            }}},
+        }
+
+    def proposicoes(self, limite=None):
+        for indice in range(self.total if limite is None else min(limite, self.total)):
+            yield self.proposicao_coletada(indice)
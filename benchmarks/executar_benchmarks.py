@@ -0,0 +1,300 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import acess_api
+import cache_http
+import config
+import duplicatas
+import insert_data
+from armazenamento import obter_backend
+from benchmarks.api_local import ServidorCamaraLocal
+from benchmarks.corpus_sintetico import CorpusSintetico
+
+# =============================================================================
+# SUÍTE DE BENCHMARKS DO PIPELINE OASIS
+# =============================================================================
+# Uso (a partir da raiz do projeto):
+#   python -m benchmarks.executar_benchmarks --tamanhos 1000,10000 --etapas todas
+#
+# Nada aqui acessa dadosabertos.camara.leg.br nem um MySQL real: a coleta usa
+# o servidor local (api_local.py, Câmara e Senado) e a carga/consultas usam um banco embutido
+# em diretório temporário. Cada resultado vira uma linha JSON em --saida.
+
+ETAPAS = ["coleta", "limpeza", "embedding", "filtragem", "deduplicacao", "carga", "consultas"]
+
+# Espelho das consultas do dashboard.py com os filtros padrão (período + threshold)
+CONSULTAS_DASHBOARD = {
+    "por_ano": "SELECT {ano} AS ano, COUNT(DISTINCT cluster_id) AS quantidade FROM Projetos {where} GROUP BY {ano} ORDER BY ano",
+    "por_partido": "SELECT partido, COUNT(DISTINCT cluster_id) AS quantidade FROM Projetos {where} AND partido IS NOT NULL AND partido <> '' GROUP BY partido ORDER BY quantidade DESC",
+    "por_autor": "SELECT autor, COUNT(DISTINCT cluster_id) AS quantidade FROM Projetos {where} AND autor IS NOT NULL AND autor <> '' GROUP BY autor ORDER BY quantidade DESC",
+    "por_descricao": "SELECT descricao, COUNT(DISTINCT cluster_id) AS quantidade FROM Projetos {where} AND descricao IS NOT NULL AND descricao <> '' GROUP BY descricao ORDER BY quantidade DESC",
+    "por_situacao": "SELECT situacao, COUNT(DISTINCT cluster_id) AS quantidade FROM Projetos {where} AND situacao IS NOT NULL AND situacao <> '' GROUP BY situacao ORDER BY quantidade DESC",
+    "proposicoes": "SELECT norma, {score} AS similaridade, autor, partido, situacao, datadeapresentacao, ementa, indexacao, linkweb FROM Projetos {where} ORDER BY datadeapresentacao DESC",
+    "distintos_partido": "SELECT DISTINCT partido FROM Projetos WHERE partido IS NOT NULL AND partido <> '' ORDER BY partido",
+}
+
+
+@contextlib.contextmanager
+def diretorio_temporario():
+    """Executa em um diretório temporário (o acess_api.py usa caminhos relativos)."""
+    anterior = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="oasis_bench_") as pasta:
+        os.chdir(pasta)
+        try:
+            yield pasta
+        finally:
+            os.chdir(anterior)
+
+
+def cronometrar(funcao, *args, **kwargs):
+    inicio = time.perf_counter()
+    retorno = funcao(*args, **kwargs)
+    return time.perf_counter() - inicio, retorno
+
+
+def resultado(etapa, n, segundos, **extra):
+    return {"etapa": etapa, "n": n, "segundos": round(segundos, 6),
+            "registros_por_s": round(n / segundos, 2) if segundos > 0 else None, **extra}
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=config.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- Benchmarks individuais ---
+def bench_coleta(corpus_total, args):
+    """Coleta a frio (cache HTTP vazio) e a quente (respostas servidas pelo cache HTTP).
+
+    Câmara e Senado são coletados em paralelo por acess_api.coletar_fontes(),
+    como no pipeline; o Senado recebe um corpus sintético de 1/4 do tamanho.
+    """
+    n = min(corpus_total, args.max_coleta)
+    corpus = CorpusSintetico(n, semente=args.semente)
+    corpus_senado = CorpusSintetico(max(n // 4, 1), semente=args.semente + 1)
+    originais = (acess_api.CAMARA_BASE_URL, acess_api.SENADO_BASE_URL, acess_api.DATA_INICIO_COLETA,
+                 acess_api.DATA_FIM_COLETA, config.HTTP_CACHE_ARQUIVO)
+    fontes = acess_api.fontes_ativas()
+    resultados = []
+
+    with ServidorCamaraLocal(corpus, latencia=args.latencia, corpus_senado=corpus_senado) as servidor, \
+            diretorio_temporario() as pasta:
+        acess_api.CAMARA_BASE_URL = servidor.url_api
+        acess_api.SENADO_BASE_URL = servidor.url_senado
+        acess_api.DATA_INICIO_COLETA, acess_api.DATA_FIM_COLETA = corpus.inicio, corpus.fim
+        config.HTTP_CACHE_ARQUIVO = os.path.join(pasta, "cache_http.sqlite")
+        cache_http.armazem_global = None
+        try:
+            for rodada in ("coleta", "coleta_cache_http"):
+                # Sem os JSON de corpus, cada fonte refaz a coleta (só o cache HTTP sobrevive)
+                for fonte in fontes:
+                    if os.path.exists(fonte.arquivo_cache):
+                        os.remove(fonte.arquivo_cache)
+                antes = servidor.total_requisicoes
+                segundos, dados = cronometrar(acess_api.coletar_fontes, fontes)
+                por_casa = {f.casa: sum(1 for p in dados if p.get('casa') == f.casa) for f in fontes}
+                resultados.append(resultado(rodada, len(dados), segundos, por_casa=por_casa,
+                                            requisicoes=servidor.total_requisicoes - antes,
+                                            latencia_injetada_s=args.latencia))
+        finally:
+            (acess_api.CAMARA_BASE_URL, acess_api.SENADO_BASE_URL, acess_api.DATA_INICIO_COLETA,
+             acess_api.DATA_FIM_COLETA, config.HTTP_CACHE_ARQUIVO) = originais
+            cache_http.armazem_global = None
+    return resultados
+
+
+def bench_limpeza(registros, args):
+    segundos, _ = cronometrar(lambda: [acess_api.limpar_ementa_para_vetorizacao(p.get('ementa', '')) for p in registros])
+    return resultado("limpeza", len(registros), segundos)
+
+
+def bench_embedding(registros, model, args):
+    amostra = registros[:args.max_embedding]
+    textos = [acess_api.limpar_ementa_para_vetorizacao(p.get('ementa', '')) for p in amostra]
+    segundos, _ = cronometrar(model.encode, textos, batch_size=32, show_progress_bar=False)
+    return resultado("embedding", len(textos), segundos, modelo=acess_api.MODELO_NOME)
+
+
+def preparar_cache_embeddings(registros, model):
+    """Gera a matriz de embeddings do corpus codificando só as ementas distintas."""
+    textos = [acess_api.limpar_ementa_para_vetorizacao(p.get('ementa', '')) for p in registros]
+    distintos = sorted(set(textos))
+    posicao = {t: i for i, t in enumerate(distintos)}
+    embs_distintos = model.encode(distintos, batch_size=64, show_progress_bar=False)
+    np.save(acess_api.ARQUIVO_CACHE_EMB, embs_distintos[[posicao[t] for t in textos]])
+    acess_api.salvar_json([acess_api.chave_ementa(p) for p in registros], acess_api.ARQUIVO_CACHE_EMB_CHAVES)
+
+
+def bench_filtragem(registros, model, args):
+    with diretorio_temporario():
+        preparar_cache_embeddings(registros, model)
+        kw_data = acess_api.gerar_keywords_embeddings(registros, model)
+        segundos, _ = cronometrar(acess_api.executar_filtragem, registros, kw_data, model)
+        linhas = pq.read_metadata(acess_api.NOME_ARQUIVO_SAIDA_FINAL).num_rows if os.path.exists(acess_api.NOME_ARQUIVO_SAIDA_FINAL) else 0
+    return resultado("filtragem", len(registros), segundos, selecionados=linhas)
+
+
+def bench_deduplicacao(registros, args):
+    """
+    Vetores sintéticos (sem modelo) na dimensão do paraphrase-multilingual:
+    a cada 10 ementas, uma é reapresentação levemente perturbada de outra.
+    """
+    n = len(registros)
+    rng = np.random.default_rng(args.semente)
+    embs = rng.standard_normal((n, 384)).astype(np.float32)
+    copias = np.arange(0, n - 1, 10)
+    embs[copias + 1] = embs[copias] + 0.1 * rng.standard_normal((len(copias), 384)).astype(np.float32)
+
+    segundos, raizes = cronometrar(duplicatas.agrupar, embs)
+    recuperadas = int(np.sum(raizes[copias] == raizes[copias + 1]))
+    return resultado("deduplicacao", n, segundos, grupos=int(len(np.unique(raizes))),
+                     pares_injetados=len(copias), pares_recuperados=recuperadas)
+
+
+def escrever_parquet_sintetico(registros, caminho):
+    linhas = []
+    for i, p in enumerate(registros):
+        meta = acess_api.extrair_metadados_para_csv(p)
+        # Scores brutos determinísticos, espalhados entre o piso e 0.7
+        score_sem = acess_api.PISO_CANDIDATOS + (0.7 - acess_api.PISO_CANDIDATOS) * ((i * 7919) % 1000) / 1000
+        boost = 1.0 if i % 3 == 0 else 0.0
+        linhas.append({
+            "Norma": f"{p.get('siglaTipo')} {p.get('numero')}/{p.get('ano')}",
+            "Casa": p.get('casa', "Câmara"),
+            "Similaridade Semantica": round(acess_api.score_hibrido(score_sem, boost), 4),
+            "Score Semantico": round(score_sem, 4),
+            "Boost Keyword": boost,
+            "Descricao da Sigla": p.get('descricaoTipo') or p.get('siglaTipo', ''),  # descricao é NOT NULL
+            "Data de Apresentacao": acess_api.converter_data(p.get('dataApresentacao', '')),
+            "Autor": meta['autores'],
+            "Partido": meta['partido'],
+            "Ementa": p.get('ementa', ''),
+            "Link Documento PDF": p.get('urlInteiroTeor', ''),
+            "Link Página Web": p.get('url_pagina_web_oficial', ''),
+            "Indexacao": p.get('keywords', ''),
+            "Último Estado": meta['ultimo_estado'],
+            "Data Último Estado": acess_api.converter_data(meta['data_ultimo']),
+            "Situação": meta['situacao'],
+            "Grupo Duplicatas": f"Câmara-{registros[i - i % 3]['id']}",  # grupos de 3
+        })
+    pq.write_table(pa.Table.from_pylist(linhas, schema=acess_api.ESQUEMA_SAIDA), caminho)
+
+
+def bench_carga_e_consultas(registros, args, etapas):
+    resultados = []
+    with diretorio_temporario() as pasta:
+        config.DUCKDB_ARQUIVO = os.path.join(pasta, "bench.duckdb")
+        config.DUCKDB_ARQUIVO_CARGA = os.path.join(pasta, "bench_carga.duckdb")
+        config.SQLITE_ARQUIVO = os.path.join(pasta, "bench.sqlite")
+        backend = obter_backend(args.backend)
+        backend.recriar_schema()
+
+        caminho = os.path.join(pasta, "bench.parquet")
+        escrever_parquet_sintetico(registros, caminho)
+
+        segundos, total = cronometrar(insert_data.carregar_parquet, backend, caminho)
+        # Vazão só vale para linhas que chegaram ao banco
+        no_banco = int(backend.consultar("SELECT COUNT(*) AS n FROM Projetos")["n"][0])
+        if no_banco != total or total != len(registros):
+            raise RuntimeError(f"Carga inconsistente: {len(registros)} linhas no Parquet, "
+                               f"{total} contadas, {no_banco} em Projetos")
+        if "carga" in etapas:
+            resultados.append(resultado("carga", total, segundos, backend=backend.nome))
+
+        if "consultas" in etapas:
+            semantico = "(CASE WHEN score_inteiro_teor > score_semantico THEN score_inteiro_teor ELSE score_semantico END)"
+            score = f"({semantico} * {config.PESO_SEMANTICO} + boost_keyword * {config.PESO_KEYWORD})"
+            where = (f"WHERE datadeapresentacao BETWEEN '2000-01-01' AND '2100-12-31' "
+                     f"AND {score} >= {config.FILTRO_THRESHOLD}")
+            for nome, modelo in CONSULTAS_DASHBOARD.items():
+                query = modelo.format(where=where, score=score, ano=backend.expr_ano("datadeapresentacao"))
+                tempos = [cronometrar(backend.consultar, query)[0] for _ in range(args.repeticoes)]
+                resultados.append({
+                    "etapa": f"consulta:{nome}", "n": total, "backend": backend.nome,
+                    "segundos": round(statistics.median(tempos), 6),
+                    "min_s": round(min(tempos), 6), "max_s": round(max(tempos), 6),
+                    "repeticoes": args.repeticoes,
+                })
+    return resultados
+
+
+def executar(args):
+    etapas = ETAPAS if args.etapas == "todas" else [e.strip() for e in args.etapas.split(",")]
+    tamanhos = [int(t) for t in args.tamanhos.split(",")]
+
+    model = None
+    if any(e in etapas for e in ("embedding", "filtragem")):
+        model = acess_api.carregar_modelo()
+
+    execucao = {
+        "inicio": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+    }
+
+    resultados = []
+    for n in tamanhos:
+        print(f"\n[BENCH] Corpus sintético com {n} proposições", flush=True)
+        registros = list(CorpusSintetico(n, semente=args.semente).proposicoes())
+
+        if "coleta" in etapas:
+            resultados.extend(bench_coleta(n, args))
+        if "limpeza" in etapas:
+            resultados.append(bench_limpeza(registros, args))
+        if "embedding" in etapas:
+            resultados.append(bench_embedding(registros, model, args))
+        if "filtragem" in etapas:
+            resultados.append(bench_filtragem(registros, model, args))
+        if "deduplicacao" in etapas:
+            resultados.append(bench_deduplicacao(registros, args))
+        if "carga" in etapas or "consultas" in etapas:
+            resultados.extend(bench_carga_e_consultas(registros, args, etapas))
+
+        for r in resultados:
+            r.setdefault("corpus", n)
+
+    with open(args.saida, "a", encoding="utf-8") as f:
+        for r in resultados:
+            f.write(json.dumps({**execucao, **r}, ensure_ascii=False) + "\n")
+
+    print("\n--- RESULTADOS ---")
+    for r in resultados:
+        print(f" {r['etapa']:<28} n={r['n']:<9} {r['segundos']:>10.4f}s  {r.get('registros_por_s') or ''}")
+    print(f"\nResultados adicionados em '{args.saida}'.")
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline OASIS com corpus sintético")
+    parser.add_argument("--tamanhos", default="1000,10000", help="Tamanhos de corpus separados por vírgula (ex.: 1000,100000,1000000)")
+    parser.add_argument("--etapas", default="todas", help=f"'todas' ou lista entre: {', '.join(ETAPAS)}")
+    parser.add_argument("--saida", default="bench_resultados.jsonl", help="Arquivo JSON lines (acrescenta uma linha por medição)")
+    parser.add_argument("--backend", default="duckdb", help="Backend embutido para carga/consultas (duckdb ou sqlite)")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latência injetada no servidor local (s)")
+    parser.add_argument("--max-coleta", type=int, default=2000, help="Limite de proposições coletadas via HTTP")
+    parser.add_argument("--max-embedding", type=int, default=5000, help="Limite de ementas no benchmark de embedding")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições por consulta do dashboard")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args(argv)
+    executar(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
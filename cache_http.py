@@ -0,0 +1,174 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from email.utils import formatdate
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+import config
+import metricas
+
+# =============================================================================
+# CACHE HTTP PERSISTENTE COM REVALIDAÇÃO CONDICIONAL
+# =============================================================================
+# Adaptador do requests montado na Session do acess_api.py. Para cada GET:
+#   1. Resposta em cache ainda "fresca" (TTL do endpoint) -> devolvida sem rede;
+#   2. Resposta expirada com ETag/Last-Modified -> requisição condicional
+#      (If-None-Match / If-Modified-Since); um 304 renova a entrada;
+#   3. Sem cache -> requisição normal, e respostas 200 são gravadas.
+# No modo offline (OASIS_HTTP_OFFLINE=1) nada vai para a rede: só o que está
+# em cache é respondido, permitindo reexecutar coletas antigas.
+
+# TTL (segundos) por endpoint; a primeira expressão que casar com a URL vale
+TTL_POR_ENDPOINT = [
+    (r"/deputados/\d+$", 7 * 24 * 3600),           # partido muda raramente
+    (r"/proposicoes/\d+/autores$", 30 * 24 * 3600),  # autoria não muda
+    (r"/proposicoes/\d+$", 24 * 3600),             # statusProposicao muda com a tramitação
+    (r"/proposicoes$", 6 * 3600),                  # listagens paginadas
+    (r"/deputados$", 24 * 3600),
+    (r"/materia/pesquisa/lista\.json$", 6 * 3600),  # Senado: pesquisa por período
+    (r"/materia/\d+\.json$", 24 * 3600),            # Senado: detalhe da matéria
+]
+TTL_PADRAO = 3600
+
+
+def ttl_para(url):
+    caminho = url.split("?", 1)[0]
+    for padrao, ttl in TTL_POR_ENDPOINT:
+        if re.search(padrao, caminho):
+            return ttl
+    return TTL_PADRAO
+
+
+class ArmazemRespostas:
+    """Respostas HTTP persistidas em um arquivo SQLite (seguro entre threads)."""
+
+    def __init__(self, caminho):
+        self.trava = threading.Lock()
+        self.cnx = sqlite3.connect(caminho, check_same_thread=False)
+        self.cnx.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                url             TEXT PRIMARY KEY,
+                status          INTEGER NOT NULL,
+                cabecalhos      TEXT NOT NULL,
+                corpo           BLOB NOT NULL,
+                etag            TEXT,
+                last_modified   TEXT,
+                armazenado_em   REAL NOT NULL
+            )
+        """)
+        self.cnx.commit()
+
+    def obter(self, url):
+        with self.trava:
+            linha = self.cnx.execute(
+                "SELECT status, cabecalhos, corpo, etag, last_modified, armazenado_em FROM respostas WHERE url = ?",
+                (url,)).fetchone()
+        if not linha:
+            return None
+        status, cabecalhos, corpo, etag, last_modified, armazenado_em = linha
+        return {"status": status, "cabecalhos": json.loads(cabecalhos), "corpo": corpo,
+                "etag": etag, "last_modified": last_modified, "armazenado_em": armazenado_em}
+
+    def gravar(self, url, resposta):
+        cabecalhos = {k: v for k, v in resposta.headers.items()
+                      if k.lower() not in ("content-encoding", "transfer-encoding", "content-length")}
+        with self.trava:
+            self.cnx.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, resposta.status_code, json.dumps(cabecalhos), resposta.content,
+                 resposta.headers.get("ETag"), resposta.headers.get("Last-Modified"), time.time()))
+            self.cnx.commit()
+
+    def renovar(self, url):
+        with self.trava:
+            self.cnx.execute("UPDATE respostas SET armazenado_em = ? WHERE url = ?", (time.time(), url))
+            self.cnx.commit()
+
+
+class AdaptadorCacheHTTP(HTTPAdapter):
+    def __init__(self, armazem, offline=False, ttl_maximo=None, **kwargs):
+        super().__init__(**kwargs)
+        self.armazem = armazem
+        self.offline = offline
+        self.ttl_maximo = ttl_maximo
+
+    def ttl(self, url):
+        ttl = ttl_para(url)
+        return min(ttl, self.ttl_maximo) if self.ttl_maximo else ttl
+
+    def montar_resposta(self, request, entrada):
+        resposta = requests.Response()
+        resposta.status_code = entrada["status"]
+        resposta.headers = CaseInsensitiveDict(entrada["cabecalhos"])
+        resposta._content = entrada["corpo"]
+        resposta.url = request.url
+        resposta.request = request
+        resposta.reason = "OK (cache)"
+        resposta.encoding = requests.utils.get_encoding_from_headers(resposta.headers)
+        resposta.from_cache = True
+        return resposta
+
+    def send(self, request, **kwargs):
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        url = request.url
+        entrada = self.armazem.obter(url)
+        endpoint = metricas.normalizar_endpoint(url)
+
+        if entrada and (self.offline or time.time() - entrada["armazenado_em"] < self.ttl(url)):
+            metricas.incrementar("oasis_http_cache_total", 1, "Cache HTTP por resultado", endpoint=endpoint, resultado="fresco")
+            return self.montar_resposta(request, entrada)
+
+        if self.offline:
+            metricas.incrementar("oasis_http_cache_total", 1, "Cache HTTP por resultado", endpoint=endpoint, resultado="ausente_offline")
+            raise requests.ConnectionError(f"Modo offline: '{url}' não está no cache HTTP")
+
+        if entrada:
+            if entrada["etag"]:
+                request.headers["If-None-Match"] = entrada["etag"]
+            if entrada["last_modified"]:
+                request.headers["If-Modified-Since"] = entrada["last_modified"]
+            elif not entrada["etag"]:
+                request.headers["If-Modified-Since"] = formatdate(entrada["armazenado_em"], usegmt=True)
+
+        resposta = super().send(request, **kwargs)
+
+        if resposta.status_code == 304 and entrada:
+            self.armazem.renovar(url)
+            metricas.incrementar("oasis_http_cache_total", 1, "Cache HTTP por resultado", endpoint=endpoint, resultado="revalidado")
+            resposta.close()
+            return self.montar_resposta(request, entrada)
+
+        metricas.incrementar("oasis_http_cache_total", 1, "Cache HTTP por resultado", endpoint=endpoint, resultado="miss")
+        if resposta.status_code == 200:
+            self.armazem.gravar(url, resposta)
+        return resposta
+
+
+armazem_global = None
+trava_armazem = threading.Lock()
+
+
+def instalar_cache(session, caminho=None, offline=None):
+    """Monta o cache HTTP persistente em http:// e https:// da sessão."""
+    global armazem_global
+    if not config.HTTP_CACHE_ATIVO:
+        return session
+    with trava_armazem:
+        if caminho:
+            armazem = ArmazemRespostas(caminho)
+        else:
+            if armazem_global is None:
+                armazem_global = ArmazemRespostas(config.HTTP_CACHE_ARQUIVO)
+            armazem = armazem_global
+    adaptador = AdaptadorCacheHTTP(armazem, offline=config.HTTP_OFFLINE if offline is None else offline,
+                                   ttl_maximo=config.HTTP_TTL_MAXIMO)
+    session.mount("http://", adaptador)
+    session.mount("https://", adaptador)
+    return session
@@ -0,0 +1,64 @@
+import os
+
+# =============================================================================
+# CONFIGURAÇÃO CENTRAL DO PROJETO (OASIS)
+# =============================================================================
+# Todos os valores podem ser sobrescritos por variáveis de ambiente, evitando
+# editar senha/servidor em vários arquivos.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- BACKEND DE ARMAZENAMENTO ---
+# "mysql"  -> servidor MySQL local (padrão, comportamento original)
+# "duckdb" -> banco embutido colunar em arquivo (sem servidor)
+# "sqlite" -> banco embutido em arquivo (fallback se o duckdb não estiver instalado)
+DB_BACKEND = os.environ.get("OASIS_DB_BACKEND", "mysql").lower()
+
+# --- MYSQL ---
+DB_HOST = os.environ.get("OASIS_DB_HOST", "localhost")
+DB_USER = os.environ.get("OASIS_DB_USER", "root")
+DB_PASSWORD = os.environ.get("OASIS_DB_PASSWORD", " ")
+DB_NAME = os.environ.get("OASIS_DB_NAME", "Oasis")
+
+# --- BANCOS EMBUTIDOS (DuckDB / SQLite) ---
+DUCKDB_ARQUIVO = os.environ.get("OASIS_DUCKDB_ARQUIVO", os.path.join(BASE_DIR, "oasis.duckdb"))
+# Arquivo temporário onde a carga do DuckDB é montada antes da publicação
+DUCKDB_ARQUIVO_CARGA = os.path.splitext(DUCKDB_ARQUIVO)[0] + "_carga.duckdb"
+SQLITE_ARQUIVO = os.environ.get("OASIS_SQLITE_ARQUIVO", os.path.join(BASE_DIR, "oasis.sqlite"))
+
+# --- MÉTRICAS E PERFIL ---
+# OASIS_METRICAS=0 desliga a gravação dos arquivos de métricas
+METRICAS_ATIVAS = os.environ.get("OASIS_METRICAS", "1") != "0"
+METRICAS_DIR = os.environ.get("OASIS_METRICAS_DIR", os.path.join(BASE_DIR, "metricas"))
+METRICAS_EVENTOS = os.path.join(METRICAS_DIR, "eventos.jsonl")
+# Etapas a perfilar com cProfile, separadas por vírgula (ou "todas")
+PERFILAR_ETAPAS = os.environ.get("OASIS_PERFILAR", "")
+
+# --- CACHE HTTP (acess_api.py) ---
+# Respostas da API ficam em disco e são revalidadas (ETag/Last-Modified ou TTL)
+HTTP_CACHE_ATIVO = os.environ.get("OASIS_HTTP_CACHE", "1") != "0"
+HTTP_CACHE_ARQUIVO = os.environ.get("OASIS_HTTP_CACHE_ARQUIVO", os.path.join(BASE_DIR, "cache_http.sqlite"))
+# OASIS_HTTP_OFFLINE=1 responde apenas com o cache (reexecução de coletas sem rede)
+HTTP_OFFLINE = os.environ.get("OASIS_HTTP_OFFLINE", "0") == "1"
+# Limite (s) para o TTL de qualquer endpoint; o atualizador.py usa o intervalo
+# entre rodadas, para que listagens em cache não escondam proposições novas
+HTTP_TTL_MAXIMO = int(os.environ.get("OASIS_HTTP_TTL_MAXIMO", "0")) or None
+
+# --- FILTRO HÍBRIDO (acess_api.py e dashboard.py) ---
+# Score final = score semântico * PESO_SEMANTICO + boost de keyword * PESO_KEYWORD.
+# Os valores abaixo são o padrão; no dashboard, pesos e threshold são ajustáveis.
+PESO_SEMANTICO = 0.5
+PESO_KEYWORD = 0.5
+FILTRO_THRESHOLD = 0.45
+# Candidatos gravados no banco: score semântico >= PISO_CANDIDATOS ou com boost.
+# Com pesos até 1, qualquer threshold >= piso é reproduzível sem reexecutar o pipeline.
+PISO_CANDIDATOS = 0.2
+
+# --- INTEIRO TEOR (acess_api.py / inteiro_teor.py) ---
+# OASIS_INTEIRO_TEOR=1 baixa o texto completo das proposições (requer pypdf) e
+# usa o trecho mais parecido com a consulta junto com o score da ementa
+INTEIRO_TEOR_ATIVO = os.environ.get("OASIS_INTEIRO_TEOR", "0") == "1"
+INTEIRO_TEOR_DOWNLOADS = int(os.environ.get("OASIS_INTEIRO_TEOR_DOWNLOADS", "8"))  # downloads simultâneos
+
+# --- ATUALIZADOR EM SEGUNDO PLANO (atualizador.py) ---
+# Intervalo (s) entre rodadas de coleta incremental + filtragem + publicação
+ATUALIZACAO_INTERVALO = int(os.environ.get("OASIS_ATUALIZACAO_INTERVALO", "600"))
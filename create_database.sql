@@ -9,7 +9,12 @@ CREATE TABLE Projetos
 (
     id                      INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
     norma                   VARCHAR(255) NOT NULL,
+    casa                    VARCHAR(20),
     descricao               VARCHAR(255) NOT NULL,
+    similaridade            FLOAT,
+    score_semantico         FLOAT,
+    boost_keyword           FLOAT,
+    score_inteiro_teor      FLOAT,
     datadeapresentacao      DATE,
     autor                   TEXT,
     partido                 VARCHAR(50),
@@ -19,6 +24,14 @@ CREATE TABLE Projetos
     indexacao               TEXT,
     ultimoestado            VARCHAR(255),
     dataultimo              DATE,
-    situacao                VARCHAR(255)
+    situacao                VARCHAR(255),
+    cluster_id              VARCHAR(64)
 );
 
+
+CREATE TABLE Atualizacoes
+(
+    versao                  INT NOT NULL,
+    publicado_em            DATETIME NOT NULL,
+    linhas                  INT
+);
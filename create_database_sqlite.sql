@@ -0,0 +1,39 @@
+DROP TABLE IF EXISTS Projetos_novo;
+
+DROP TABLE IF EXISTS Projetos_antigo;
+
+DROP TABLE IF EXISTS Projetos;
+
+DROP TABLE IF EXISTS Atualizacoes;
+
+
+CREATE TABLE Projetos
+(
+    id                      INTEGER PRIMARY KEY AUTOINCREMENT,
+    norma                   VARCHAR(255) NOT NULL,
+    casa                    VARCHAR(20),
+    descricao               VARCHAR(255) NOT NULL,
+    similaridade            FLOAT,
+    score_semantico         FLOAT,
+    boost_keyword           FLOAT,
+    score_inteiro_teor      FLOAT,
+    datadeapresentacao      DATE,
+    autor                   TEXT,
+    partido                 VARCHAR(50),
+    ementa                  TEXT,
+    linkpdf                 VARCHAR(255),
+    linkweb                 VARCHAR(255),
+    indexacao               TEXT,
+    ultimoestado            VARCHAR(255),
+    dataultimo              DATE,
+    situacao                VARCHAR(255),
+    cluster_id              VARCHAR(64)
+);
+
+
+CREATE TABLE Atualizacoes
+(
+    versao                  INTEGER NOT NULL,
+    publicado_em            TIMESTAMP NOT NULL,
+    linhas                  INTEGER
+);
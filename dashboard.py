@@ -1,9 +1,16 @@
 import streamlit as st
-import mysql.connector
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import os
+import threading
+import time
 from datetime import date
 
+import config
+import metricas
+from armazenamento import obter_backend
+
 
 # ==============================================
 # 1) CONFIGURAÇÃO BÁSICA DO APP
@@ -13,23 +20,50 @@ st.set_page_config(
     layout="wide"
 )
 
-st.title("Dashboard dos Projetos de Lei da Câmara dos Deputados - OASIS")
+st.title("Dashboard dos Projetos de Lei da Câmara dos Deputados e do Senado Federal - OASIS")
 
 
 # ==============================================
 # 2) CONEXÃO E FUNÇÕES AUXILIARES
 # ==============================================
+backend = obter_backend()
+metricas.configurar("dashboard")
+
+# Marca, por thread, se a última chamada executou a consulta (miss) ou veio do cache
+estado_cache = threading.local()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def versao_dados():
+    """Última publicação em Atualizacoes; muda a cada carga (main.py ou atualizador.py)."""
+    try:
+        df = backend.consultar("SELECT MAX(versao) AS versao, MAX(publicado_em) AS publicado_em FROM Atualizacoes")
+        return f"{df['versao'].iloc[0]}:{df['publicado_em'].iloc[0]}"
+    except Exception:
+        return "sem_versao"
+
 @st.cache_data
+def consultar_banco(query, versao):
+    # 'versao' só compõe a chave do cache: uma nova publicação invalida os resultados
+    estado_cache.miss = True
+    inicio = time.perf_counter()
+    df = backend.consultar(query)
+    metricas.observar("oasis_dashboard_consulta_banco_segundos", time.perf_counter() - inicio,
+                      "Latência das consultas ao banco (cache miss)", backend=backend.nome)
+    return df
+
 def load_data(query):
-    conn = mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password=" ",
-        database="Oasis"
-    )
-    return pd.read_sql(query, conn)
+    estado_cache.miss = False
+    inicio = time.perf_counter()
+    df = consultar_banco(query, versao_dados())
+    duracao = time.perf_counter() - inicio
+
+    metricas.registrar_cache("streamlit_load_data", not estado_cache.miss)
+    metricas.observar("oasis_dashboard_consulta_segundos", duracao,
+                      "Latência por consulta do dashboard (incluindo cache)", backend=backend.nome)
+    metricas.registrar_evento("consulta_dashboard", segundos=round(duracao, 6), cache_hit=not estado_cache.miss,
+                              linhas=len(df), consulta=" ".join(query.split())[:200])
+    return df
 
-@st.cache_data
 def load_distinct_values(coluna):
     query = f"""
     SELECT DISTINCT {coluna}
@@ -40,7 +74,6 @@ def load_distinct_values(coluna):
     df = load_data(query)
     return df[coluna].tolist()
 
-@st.cache_data
 def load_min_date():
     query = """
     SELECT MIN(datadeapresentacao) AS min_date
@@ -48,9 +81,8 @@ def load_min_date():
     WHERE datadeapresentacao IS NOT NULL;
     """
     df = load_data(query)
-    return df["min_date"].iloc[0]
+    return pd.to_datetime(df["min_date"].iloc[0]).date()
 
-@st.cache_data
 def load_max_date():
     query = """
     SELECT MAX(datadeapresentacao) AS max_date
@@ -58,7 +90,123 @@ def load_max_date():
     WHERE datadeapresentacao IS NOT NULL;
     """
     df = load_data(query)
-    return df["max_date"].iloc[0]
+    return pd.to_datetime(df["max_date"].iloc[0]).date()
+
+
+# ==============================================
+# 2.1) BUSCA SEMÂNTICA (MODELO + EMBEDDINGS DAS EMENTAS)
+# ==============================================
+# O acess_api (torch / sentence-transformers) só é importado quando a busca é
+# usada. Modelo e índice ficam em st.cache_resource (um por processo); vetores
+# de consulta e resultados ficam em st.cache_data, por consulta.
+
+@st.cache_resource(show_spinner="Carregando modelo de linguagem...")
+def carregar_modelo_busca():
+    import acess_api
+    return acess_api.carregar_modelo()
+
+@st.cache_resource(show_spinner="Carregando embeddings das ementas...", max_entries=1)
+def carregar_indice_busca(versao):
+    import acess_api
+    db = acess_api.carregar_corpus_local()
+    if not db or not acess_api.cache_embeddings_valido(db):
+        return None
+
+    # Normaliza uma vez: o cosseno de cada consulta vira um único produto matriz-vetor
+    embs = np.array(np.load(acess_api.ARQUIVO_CACHE_EMB, mmap_mode='r'), dtype=np.float32)
+    normas = np.linalg.norm(embs, axis=1, keepdims=True)
+    embs /= np.where(normas > 0, normas, 1.0)
+
+    # Colunas dos filtros da barra lateral, para filtrar antes do corte em 'limite'
+    metas = [acess_api.extrair_metadados_para_csv(p) for p in db]
+    datas = [acess_api.converter_data(p.get('dataApresentacao', '')) for p in db]
+
+    return {
+        "db": db,
+        "embs": embs,
+        "tags": [acess_api.texto_tags(p) for p in db],
+        "kw_data": acess_api.carregar_ou_gerar_keywords(db, carregar_modelo_busca()),
+        "datas": np.array([np.datetime64(d) if d else np.datetime64("NaT") for d in datas], dtype="datetime64[D]"),
+        "casas": np.array([p.get('casa', acess_api.FONTES["camara"].casa) for p in db], dtype=object),
+        "partidos": np.array([m['partido'] for m in metas], dtype=object),
+        "situacoes": np.array([m['situacao'] for m in metas], dtype=object),
+        "chaves_teor": [acess_api.inteiro_teor.chave_documento(p['urlInteiroTeor']) if p.get('urlInteiroTeor') else None
+                        for p in db],
+    }
+
+def scores_inteiro_teor(indice, vetor):
+    """Melhor trecho do inteiro teor para a consulta (NaN sem texto); None se não houver cache."""
+    import acess_api
+    if not os.path.exists(os.path.join(acess_api.PASTA_INTEIRO_TEOR, "indice.json")):
+        return None
+    try:
+        cache = acess_api.inteiro_teor.CacheInteiroTeor(acess_api.PASTA_INTEIRO_TEOR, acess_api.MODELO_NOME)
+        melhores = cache.pontuar(vetor)
+    except (OSError, ValueError):
+        return None  # fragmentos trocados pelo atualizador no meio da leitura: só a ementa vale
+    return np.array([melhores.get(c, np.nan) if c else np.nan for c in indice["chaves_teor"]], dtype=np.float32)
+
+def mascara_filtros(indice, filtros):
+    data_inicio, data_fim, casas, partidos, situacoes = filtros
+    mascara = (indice["datas"] >= np.datetime64(data_inicio)) & (indice["datas"] <= np.datetime64(data_fim))
+    if casas:
+        mascara &= np.isin(indice["casas"], list(casas))
+    if partidos:
+        mascara &= np.isin(indice["partidos"], list(partidos))
+    if situacoes:
+        mascara &= np.isin(indice["situacoes"], list(situacoes))
+    return mascara
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def codificar_consulta(consulta):
+    import acess_api
+    vetor = carregar_modelo_busca().encode(acess_api.limpar_ementa_para_vetorizacao(consulta))
+    norma = np.linalg.norm(vetor)
+    return vetor / norma if norma > 0 else vetor
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def buscar_semantico(consulta, limite, peso_semantico, peso_keyword, threshold, usar_teor, filtros, versao):
+    """Mesma fórmula híbrida da filtragem (semântico + boost de keywords), ranqueada.
+
+    Os filtros da barra lateral são aplicados antes do corte em 'limite'; com
+    'usar_teor', o semântico é o maior entre a ementa e o melhor trecho do
+    inteiro teor, como nas consultas SQL do dashboard.
+    """
+    import acess_api
+    import torch
+    indice = carregar_indice_busca(versao)
+    vetor = codificar_consulta(consulta)
+
+    scores_ementa = indice["embs"] @ vetor
+    scores_teor = scores_inteiro_teor(indice, vetor) if usar_teor else None
+    scores_sem = scores_ementa if scores_teor is None else np.fmax(scores_ementa, scores_teor)
+    tags_alvo = acess_api.identificar_tags_alvo(torch.from_numpy(vetor), indice["kw_data"])
+    boosts = np.fromiter((acess_api.boost_keyword(t, tags_alvo) for t in indice["tags"]),
+                         dtype=np.float32, count=len(indice["tags"]))
+    scores = acess_api.score_hibrido(scores_sem, boosts, peso_semantico, peso_keyword)
+
+    selecionados = np.flatnonzero((scores >= threshold) & mascara_filtros(indice, filtros))
+    selecionados = selecionados[np.argsort(-scores[selecionados], kind="stable")][:limite]
+    linhas = acess_api.formatar_linhas((indice["db"][i], float(scores_ementa[i]), float(boosts[i]))
+                                       for i in selecionados)
+    df = pd.DataFrame(list(linhas), columns=acess_api.ESQUEMA_SAIDA.names)
+    # A coluna de similaridade segue os pesos escolhidos no dashboard
+    df["Similaridade Semantica"] = scores[selecionados].round(4)
+    if scores_teor is not None:
+        df["Score Inteiro Teor"] = scores_teor[selecionados].round(4)
+    return df, tags_alvo
+
+def busca_semantica(consulta, limite, peso_semantico, peso_keyword, threshold, usar_teor, filtros):
+    inicio = time.perf_counter()
+    df, tags_alvo = buscar_semantico(consulta, limite, peso_semantico, peso_keyword, threshold,
+                                     usar_teor, filtros, versao_dados())
+    duracao = time.perf_counter() - inicio
+
+    metricas.observar("oasis_dashboard_busca_segundos", duracao,
+                      "Latência da busca semântica do dashboard (incluindo cache)")
+    metricas.registrar_evento("busca_dashboard", segundos=round(duracao, 6), linhas=len(df),
+                              consulta=consulta[:200])
+    return df, tags_alvo
 
 
 # ==============================================
@@ -76,9 +224,11 @@ data_fim = st.sidebar.date_input(
     value=load_max_date()
 )
 
+lista_casas = load_distinct_values("casa")
 lista_partidos = load_distinct_values("partido")
 lista_situacoes = load_distinct_values("situacao")
 
+casa_filtro = st.sidebar.multiselect("Casa", lista_casas)
 partido_filtro = st.sidebar.multiselect("Partido", lista_partidos)
 situacao_filtro = st.sidebar.multiselect("Situação", lista_situacoes)
 
@@ -86,6 +236,31 @@ keyword = st.sidebar.text_input("Palavra-chave (ementa / indexação)")
 
 st.sidebar.markdown("---")
 
+# Os scores brutos ficam no banco: mudar pesos/threshold só refiltra, sem reexecutar o pipeline
+st.sidebar.subheader("🎚️ Filtro semântico")
+
+peso_semantico = round(st.sidebar.slider("Peso semântico", 0.0, 1.0, float(config.PESO_SEMANTICO), 0.05), 2)
+peso_keyword = round(st.sidebar.slider("Peso palavra-chave", 0.0, 1.0, float(config.PESO_KEYWORD), 0.05), 2)
+threshold = round(st.sidebar.slider("Threshold", float(config.PISO_CANDIDATOS), 1.0,
+                                    float(config.FILTRO_THRESHOLD), 0.01), 2)
+
+# Inteiro teor (quando coletado): vale o maior entre a ementa e o melhor trecho do texto
+usar_inteiro_teor = st.sidebar.checkbox("Considerar o inteiro teor (melhor trecho)", value=True)
+expr_semantico = ("(CASE WHEN score_inteiro_teor > score_semantico THEN score_inteiro_teor ELSE score_semantico END)"
+                  if usar_inteiro_teor else "score_semantico")
+
+expr_score = f"({expr_semantico} * {peso_semantico} + boost_keyword * {peso_keyword})"
+
+st.sidebar.markdown("---")
+
+# Reapresentações e apensados quase idênticos compartilham o mesmo cluster_id
+st.sidebar.subheader("🧬 Duplicatas")
+
+contar_grupos = st.sidebar.checkbox("Contar projetos quase idênticos uma vez", value=True)
+expr_contagem = "COUNT(DISTINCT cluster_id)" if contar_grupos else "COUNT(*)"
+
+st.sidebar.markdown("---")
+
 st.sidebar.subheader("📊 Gráficos")
 
 show_graf_ano = st.sidebar.checkbox("Projetos por ano", value=True)
@@ -100,9 +275,14 @@ show_graf_situacao = st.sidebar.checkbox("Situação dos projetos", value=True)
 # ==============================================
 def build_where_clause():
     conditions = [
-        f"datadeapresentacao BETWEEN '{data_inicio}' AND '{data_fim}'"
+        f"datadeapresentacao BETWEEN '{data_inicio}' AND '{data_fim}'",
+        f"{expr_score} >= {threshold}"
     ]
 
+    if casa_filtro:
+        casa_filtro_sql = ", ".join(f"'{c}'" for c in casa_filtro)
+        conditions.append(f"casa IN ({casa_filtro_sql})")
+
     if  partido_filtro:
         partido_filtro_sql = ", ".join(f"'{p}'" for p in partido_filtro)
         conditions.append(f"partido IN ({partido_filtro_sql})")
@@ -123,12 +303,13 @@ def build_where_clause():
 # ==============================================
 # 5) TABS
 # ==============================================
-tab_visaoGeral, tab_partidos, tab_autores, tab_temas, tab_proposicoes = st.tabs([
+tab_visaoGeral, tab_partidos, tab_autores, tab_temas, tab_proposicoes, tab_busca = st.tabs([
     "📈 Visão Geral",
     "🏛️ Partidos",
     "✍️ Autores",
     "📝 Temas",
-    "📄 Proposições"
+    "📄 Proposições",
+    "🔎 Busca Semântica"
 ])
 
 
@@ -140,10 +321,10 @@ with tab_visaoGeral:
 
     if show_graf_ano:
         query = f"""
-        SELECT YEAR(datadeapresentacao) AS ano, COUNT(*) AS quantidade
+        SELECT {backend.expr_ano('datadeapresentacao')} AS ano, {expr_contagem} AS quantidade
         FROM Projetos
         {build_where_clause()}
-        GROUP BY YEAR(datadeapresentacao)
+        GROUP BY {backend.expr_ano('datadeapresentacao')}
         ORDER BY ano;
         """
         df = load_data(query)
@@ -162,7 +343,7 @@ with tab_partidos:
 
     if show_graf_partido:
         query = f"""
-        SELECT partido, COUNT(*) AS quantidade
+        SELECT partido, {expr_contagem} AS quantidade
         FROM Projetos
         {build_where_clause()}
         AND partido IS NOT NULL AND partido <> ''
@@ -194,7 +375,7 @@ with tab_autores:
 
     if show_graf_autores:
         query = f"""
-        SELECT autor, COUNT(*) AS quantidade
+        SELECT autor, {expr_contagem} AS quantidade
         FROM Projetos
         {build_where_clause()}
         AND autor IS NOT NULL AND autor <> ''
@@ -228,7 +409,7 @@ with tab_temas:
 
     if show_graf_descricao:
         query = f"""
-        SELECT descricao, COUNT(*) AS quantidade
+        SELECT descricao, {expr_contagem} AS quantidade
         FROM Projetos
         {build_where_clause()}
         AND descricao IS NOT NULL AND descricao <> ''
@@ -243,7 +424,7 @@ with tab_temas:
 
     if show_graf_situacao:
         query = f"""
-        SELECT situacao, COUNT(*) AS quantidade
+        SELECT situacao, {expr_contagem} AS quantidade
         FROM Projetos
         {build_where_clause()}
         AND situacao IS NOT NULL AND situacao <> ''
@@ -276,10 +457,18 @@ with tab_proposicoes:
         "Use os filtros na barra lateral e clique em **Buscar proposições**."
     )
 
+    # O resultado continua visível quando outro widget (ex.: relacionados) é usado
     if st.button("🔍 Buscar proposições"):
+        st.session_state["buscar_proposicoes"] = True
+
+    if st.session_state.get("buscar_proposicoes"):
         query = f"""
         SELECT
+            cluster_id,
             norma,
+            casa,
+            ROUND({expr_score}, 4) AS similaridade,
+            ROUND(score_inteiro_teor, 4) AS inteiro_teor,
             autor,
             partido,
             situacao,
@@ -299,13 +488,113 @@ with tab_proposicoes:
         else:
             st.success(f"{len(df)} proposições encontradas.")
 
+            df_grupos = load_data("""
+            SELECT cluster_id, COUNT(*) - 1 AS relacionados
+            FROM Projetos
+            WHERE cluster_id IS NOT NULL
+            GROUP BY cluster_id
+            HAVING COUNT(*) > 1
+            """)
+            df = df.merge(df_grupos, on="cluster_id", how="left")
+            df["relacionados"] = df["relacionados"].fillna(0).astype(int)
+
             df = df.rename(columns={
                 "norma": "Proposição",
+                "casa": "Casa",
+                "similaridade": "Similaridade",
+                "inteiro_teor": "Inteiro Teor",
                 "autor": "Autor",
                 "partido": "Partido",
                 "situacao": "Situação",
                 "datadeapresentacao": "Data",
-                "linkweb": "Link"
+                "linkweb": "Link",
+                "relacionados": "Relacionados"
             })
 
-            st.dataframe(df, use_container_width=True)
+            st.dataframe(df.drop(columns=["cluster_id"]), use_container_width=True)
+
+            # Projetos relacionados (mesmo grupo de quase duplicatas)
+            df_com_relacionados = df[df["Relacionados"] > 0]
+            if not df_com_relacionados.empty:
+                st.subheader("🔗 Projetos relacionados")
+                escolhida = st.selectbox(
+                    "Proposição",
+                    df_com_relacionados.index,
+                    format_func=lambda i: f"{df.at[i, 'Proposição']} ({df.at[i, 'Casa']}) — {df.at[i, 'Relacionados']} relacionados"
+                )
+                query = f"""
+                SELECT norma, casa, autor, partido, situacao, datadeapresentacao, ementa, linkweb
+                FROM Projetos
+                WHERE cluster_id = '{df.at[escolhida, "cluster_id"]}'
+                ORDER BY datadeapresentacao
+                """
+                df_relacionados = load_data(query).rename(columns={
+                    "norma": "Proposição",
+                    "casa": "Casa",
+                    "autor": "Autor",
+                    "partido": "Partido",
+                    "situacao": "Situação",
+                    "datadeapresentacao": "Data",
+                    "linkweb": "Link"
+                })
+                st.dataframe(df_relacionados, use_container_width=True)
+
+
+# ==============================================
+# TAB 6 — BUSCA SEMÂNTICA
+# ==============================================
+with tab_busca:
+    st.header("🔎 Busca Semântica")
+
+    st.markdown(
+        "Pesquise um tema em linguagem natural. As proposições de todo o corpus coletado "
+        "são ranqueadas pela mesma busca híbrida do pipeline (similaridade semântica + "
+        "palavras-chave), respeitando os filtros de data, casa, partido e situação. "
+        "Com \"Considerar o inteiro teor\" marcado, o texto completo só conta para as "
+        "proposições cujo inteiro teor já foi baixado pela filtragem."
+    )
+
+    consulta = st.text_input("Tema da pesquisa", placeholder="Ex.: reconhecimento facial na segurança pública")
+    limite = st.slider("Máximo de resultados", min_value=50, max_value=2000, value=500, step=50)
+
+    if consulta.strip():
+        if carregar_indice_busca(versao_dados()) is None:
+            st.warning("Embeddings das ementas não encontrados. Execute a main.py (etapa de filtragem) primeiro.")
+            carregar_indice_busca.clear()  # tenta de novo na próxima interação
+        else:
+            filtros = (data_inicio, data_fim, tuple(casa_filtro), tuple(partido_filtro), tuple(situacao_filtro))
+            df, tags_alvo = busca_semantica(consulta.strip(), limite, peso_semantico, peso_keyword, threshold,
+                                            usar_inteiro_teor, filtros)
+
+            if tags_alvo:
+                st.caption("Palavras-chave de boost: " + ", ".join(tags_alvo[:10]))
+
+            if df.empty:
+                st.warning("Nenhuma proposição encontrada.")
+            else:
+                st.success(f"{len(df)} proposições encontradas.")
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    df_ano = (df.assign(ano=pd.to_datetime(df["Data de Apresentacao"]).dt.year)
+                              .groupby("ano").size().reset_index(name="quantidade"))
+                    fig = px.line(df_ano, x="ano", y="quantidade", title="Resultados por ano", markers=True)
+                    fig.update_xaxes(dtick=1)
+                    st.plotly_chart(fig, use_container_width=True)
+                with col2:
+                    df_partido = (df[df["Partido"].fillna("") != ""].groupby("Partido").size()
+                                  .reset_index(name="quantidade").sort_values("quantidade", ascending=False).head(20))
+                    fig = px.bar(df_partido, x="quantidade", y="Partido", orientation="h",
+                                 title="Resultados por partido (Top 20)")
+                    fig.update_yaxes(autorange="reversed")
+                    st.plotly_chart(fig, use_container_width=True)
+
+                st.dataframe(df[["Norma", "Casa", "Similaridade Semantica", "Score Inteiro Teor", "Autor", "Partido", "Situação",
+                                 "Data de Apresentacao", "Ementa", "Link Página Web"]],
+                             use_container_width=True)
+
+
+# ==============================================
+# MÉTRICAS (metricas/dashboard.prom)
+# ==============================================
+metricas.exportar_prometheus()
@@ -0,0 +1,167 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import metricas
+
+# =============================================================================
+# DIRETÓRIO PERSISTENTE DE DEPUTADOS (PARTIDO POR AUTOR)
+# =============================================================================
+# Em vez de um GET /deputados/{id} para cada autor novo, o diretório é
+# preenchido em lote pela listagem paginada /deputados?idLegislatura=N
+# (100 deputados por página) e salvo em disco entre execuções:
+#   - legislaturas passadas são baixadas uma única vez;
+#   - a legislatura atual é atualizada quando fica mais velha que o TTL;
+#   - autores que não são deputados (órgãos, Senado...) são resolvidos sem
+#     requisição, e deputados inexistentes (404) ficam registrados até FALHA_TTL;
+#     erros transitórios (timeout, 5xx) valem só até o fim da execução.
+# O GET individual só acontece para deputados ausentes da listagem.
+#
+# O partido é o ATUAL (como o ultimoStatus de /deputados/{id}): a legislatura
+# atual é sempre baixada e a entrada de um deputado nunca é sobrescrita pela
+# de uma legislatura mais antiga. Quem não está na legislatura atual fica com
+# o partido da última legislatura em que aparece.
+
+TTL_LEGISLATURA_ATUAL = 24 * 3600
+FALHA_TTL = 7 * 24 * 3600
+PARTIDO_DESCONHECIDO = "S/P"
+
+# 56ª legislatura: 01/02/2019 a 31/01/2023; cada uma dura 4 anos
+LEGISLATURA_REFERENCIA = 56
+ANO_REFERENCIA = 2019
+
+
+def legislatura_da_data(data):
+    ano = data.year - (1 if data.month == 1 else 0)
+    return LEGISLATURA_REFERENCIA + (ano - ANO_REFERENCIA) // 4
+
+
+def legislaturas_do_periodo(dt_inicio, dt_fim):
+    return list(range(legislatura_da_data(dt_inicio), legislatura_da_data(dt_fim) + 1))
+
+
+def id_deputado_da_uri(uri):
+    encontrado = re.search(r"/deputados/(\d+)", uri or "")
+    return encontrado.group(1) if encontrado else None
+
+
+class DiretorioDeputados:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.trava = threading.Lock()
+        self.legislaturas = {}  # "57" -> {"atualizado_em": ts}
+        self.autores = {}       # id do deputado ou uri -> {"partido", "nome", "tipo", "legislatura", "atualizado_em"}
+        self.falhas_transitorias = set()  # só em memória: tentadas de novo na próxima execução
+        self.carregar()
+
+    # --- Persistência ---
+    def carregar(self):
+        if not os.path.exists(self.caminho):
+            return
+        try:
+            with open(self.caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            self.legislaturas = dados.get("legislaturas", {})
+            self.autores = dados.get("autores", {})
+        except (OSError, ValueError) as e:
+            print(f"[DIRETORIO] Arquivo inválido, recomeçando do zero: {e}")
+
+    def salvar(self):
+        with self.trava:
+            dados = {"legislaturas": self.legislaturas, "autores": self.autores}
+            temporario = self.caminho + ".tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False)
+            os.replace(temporario, self.caminho)
+
+    # --- Preenchimento em lote ---
+    def precisa_atualizar(self, legislatura, atual):
+        info = self.legislaturas.get(str(legislatura))
+        if not info:
+            return True
+        return atual and time.time() - info["atualizado_em"] > TTL_LEGISLATURA_ATUAL
+
+    def atualizar(self, session, base_url, legislaturas):
+        """Baixa a listagem paginada das legislaturas ausentes ou desatualizadas."""
+        atual = legislatura_da_data(datetime.now())
+        # Da mais antiga para a atual, que sempre entra (partido atual dos deputados)
+        for legislatura in sorted(set(legislaturas) | {atual}):
+            if not self.precisa_atualizar(legislatura, legislatura == atual):
+                continue
+
+            print(f"[DIRETORIO] Atualizando deputados da {legislatura}ª legislatura...", flush=True)
+            url = f"{base_url}/deputados"
+            params = {"idLegislatura": legislatura, "itens": 100, "ordem": "ASC", "ordenarPor": "nome"}
+            paginas = 0
+            while url:
+                try:
+                    r = session.get(url, params=params, timeout=10)
+                    r.raise_for_status()
+                    data = r.json()
+                except Exception as e:
+                    print(f"    Erro na paginação de deputados: {e}")
+                    break
+
+                agora = time.time()
+                with self.trava:
+                    for d in data.get('dados', []):
+                        anterior = self.autores.get(str(d['id']))
+                        if anterior and anterior.get("legislatura", 0) > legislatura:
+                            continue  # já há o partido de uma legislatura mais recente
+                        self.autores[str(d['id'])] = {
+                            "partido": d.get('siglaPartido') or PARTIDO_DESCONHECIDO,
+                            "nome": d.get('nome'), "tipo": "deputado", "legislatura": legislatura,
+                            "atualizado_em": agora,
+                        }
+                paginas += 1
+                url = next((l['href'] for l in data.get('links', []) if l['rel'] == 'next'), None)
+                params = None
+            else:
+                with self.trava:
+                    self.legislaturas[str(legislatura)] = {"atualizado_em": time.time(), "paginas": paginas}
+
+        self.salvar()
+
+    # --- Consulta ---
+    def partido(self, session, uri_autor):
+        """Partido do autor; só faz GET individual para deputados fora da listagem."""
+        dep_id = id_deputado_da_uri(uri_autor)
+        chave = dep_id or uri_autor
+
+        with self.trava:
+            entrada = self.autores.get(chave)
+            if chave in self.falhas_transitorias:
+                return PARTIDO_DESCONHECIDO
+        if entrada and not (entrada["tipo"] == "falha" and time.time() - entrada["atualizado_em"] > FALHA_TTL):
+            metricas.registrar_cache("diretorio_deputados", True)
+            return entrada["partido"]
+
+        metricas.registrar_cache("diretorio_deputados", False)
+        if not dep_id:
+            # Órgãos, Senado, Poder Executivo...: não há partido a buscar
+            entrada = {"partido": PARTIDO_DESCONHECIDO, "nome": None, "tipo": "outro", "atualizado_em": time.time()}
+        else:
+            try:
+                r_dep = session.get(uri_autor, timeout=5)
+                if r_dep.status_code == 404:
+                    entrada = {"partido": PARTIDO_DESCONHECIDO, "nome": None, "tipo": "falha",
+                               "atualizado_em": time.time()}
+                else:
+                    r_dep.raise_for_status()
+                    d_dep = r_dep.json().get('dados', {})
+                    ultimo = d_dep.get('ultimoStatus', {})
+                    entrada = {"partido": ultimo.get('siglaPartido') or PARTIDO_DESCONHECIDO,
+                               "nome": ultimo.get('nome'), "tipo": "deputado",
+                               "legislatura": ultimo.get('idLegislatura', 0), "atualizado_em": time.time()}
+            except Exception:
+                # Timeout, 5xx...: não vai para o disco, para não esconder o partido por FALHA_TTL
+                with self.trava:
+                    self.falhas_transitorias.add(chave)
+                return PARTIDO_DESCONHECIDO
+
+        with self.trava:
+            self.autores[chave] = entrada
+        return entrada["partido"]
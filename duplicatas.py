@@ -0,0 +1,182 @@
+import time
+
+import numpy as np
+
+import metricas
+
+# =============================================================================
+# PROPOSIÇÕES QUASE IDÊNTICAS (LSH SOBRE OS EMBEDDINGS DAS EMENTAS)
+# =============================================================================
+# Reapresentações e projetos apensados costumam ter a mesma ementa com poucas
+# palavras trocadas. Comparar todos os pares (n²) não escala, então:
+#   1. cada embedding vira uma assinatura de LSH_BANDAS x LSH_BITS_POR_BANDA bits
+#      (sinal da projeção em hiperplanos aleatórios; preserva o cosseno),
+#      calculada bloco a bloco durante a varredura da filtragem (IndiceLSH);
+#   2. registros com a mesma faixa de bits em alguma banda caem no mesmo balde;
+#   3. só pares dentro de um balde são conferidos pelo cosseno exato
+#      (>= LIMIAR_DUPLICATA) e unidos em grupos (union-find).
+# Com 24 bandas de 20 bits, pares com cosseno 0.97 colidem em ~99% dos casos
+# (0.95: ~95%) e pares com cosseno 0.5 em menos de 1%, de modo que o custo
+# cresce quase linearmente mesmo em um corpus de ementas parecidas entre si.
+# Ementas idênticas (mesma chave) são unidas antes, sem passar pelo LSH.
+
+LIMIAR_DUPLICATA = 0.95
+LSH_BANDAS = 24
+LSH_BITS_POR_BANDA = 20
+SEMENTE_LSH = 0
+TAMANHO_BLOCO = 8192
+LINHAS_POR_COMPARACAO = 1024  # baldes grandes são conferidos em faixas de linhas
+
+
+def planos_lsh(dimensao, bandas=LSH_BANDAS, bits=LSH_BITS_POR_BANDA, semente=SEMENTE_LSH):
+    rng = np.random.default_rng(semente)
+    return rng.standard_normal((dimensao, bandas * bits)).astype(np.float32)
+
+
+class UniaoBusca:
+    def __init__(self, n):
+        self.pai = list(range(n))
+
+    def raiz(self, i):
+        while self.pai[i] != i:
+            self.pai[i] = self.pai[self.pai[i]]
+            i = self.pai[i]
+        return i
+
+    def unir(self, a, b):
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra != rb:
+            self.pai[max(ra, rb)] = min(ra, rb)
+
+
+def normalizar(vetores):
+    normas = np.linalg.norm(vetores, axis=1, keepdims=True)
+    return vetores / np.where(normas > 0, normas, 1.0)
+
+
+def conferir_balde(embs, membros, uniao, limiar):
+    """Cosseno exato entre os membros de um balde; une os pares acima do limiar."""
+    vetores = normalizar(np.asarray(embs[membros], dtype=np.float32))
+    for inicio in range(0, len(membros), LINHAS_POR_COMPARACAO):
+        faixa = vetores[inicio:inicio + LINHAS_POR_COMPARACAO] @ vetores[inicio:].T
+        # Só pares (a, b) com b > a
+        similares = np.triu(faixa >= limiar, k=1)
+        for a, b in zip(*np.nonzero(similares)):
+            uniao.unir(membros[inicio + a], membros[inicio + b])
+    return len(membros) * (len(membros) - 1) // 2
+
+
+class IndiceLSH:
+    """
+    Assinaturas LSH acumuladas bloco a bloco, durante a própria varredura do
+    corpus (sem uma passada extra sobre os embeddings). Guarda só os códigos
+    das bandas (uint32); o agrupamento é feito no fim, em 'agrupar'.
+    """
+
+    def __init__(self, bandas=LSH_BANDAS, bits=LSH_BITS_POR_BANDA, semente=SEMENTE_LSH):
+        self.bandas, self.bits, self.semente = bandas, bits, semente
+        self.planos = None  # dependem da dimensão, conhecida no primeiro bloco
+        self.pesos = (1 << np.arange(bits, dtype=np.int64))
+        self.linhas = []    # linhas assinadas, por bloco
+        self.codigos = []   # códigos (k, bandas), por bloco
+        self.primeira = {}  # chave da ementa -> primeira linha com ela
+        self.iguais = []    # (linha, primeira linha com a mesma ementa)
+        self.total = 0
+
+    def adicionar(self, embs, chaves=None):
+        """Assina um bloco; ementas idênticas a uma já vista são só registradas para a união."""
+        inicio = self.total
+        self.total += len(embs)
+        selecionadas = list(range(len(embs)))
+        if chaves is not None:
+            selecionadas = []
+            for j, chave in enumerate(chaves):
+                primeira = self.primeira.setdefault(chave, inicio + j)
+                if primeira == inicio + j:
+                    selecionadas.append(j)
+                else:
+                    self.iguais.append((inicio + j, primeira))
+        if self.planos is None:
+            self.planos = planos_lsh(embs.shape[1], self.bandas, self.bits, self.semente)
+
+        bloco = np.asarray(embs[selecionadas], dtype=np.float32)
+        sinais = (bloco @ self.planos > 0).reshape(len(bloco), self.bandas, self.bits)
+        self.codigos.append((sinais @ self.pesos).astype(np.uint32))
+        self.linhas.append(np.asarray(selecionadas, dtype=np.int64) + inicio)
+
+    def observar(self, blocos_embs, chave=None):
+        """Repassa os blocos (registros, embeddings) assinando cada um pelo caminho."""
+        for lote, embs_lote in blocos_embs:
+            self.adicionar(embs_lote, [chave(p) for p in lote] if chave else None)
+            yield lote, embs_lote
+
+    def baldes(self):
+        """Gera, banda a banda, as linhas de cada balde com dois ou mais membros."""
+        if not self.linhas:
+            return
+        linhas = np.concatenate(self.linhas)
+        codigos = np.concatenate(self.codigos)
+        for banda in range(self.bandas):
+            ordem = np.argsort(codigos[:, banda], kind="stable")
+            cortes = np.flatnonzero(np.diff(codigos[ordem, banda])) + 1
+            inicios = np.concatenate(([0], cortes))
+            fins = np.concatenate((cortes, [len(ordem)]))
+            for k in np.flatnonzero(fins - inicios >= 2):
+                yield linhas[ordem[inicios[k]:fins[k]]].tolist()
+
+    def agrupar(self, embs, limiar=LIMIAR_DUPLICATA):
+        """
+        Retorna, para cada linha, o índice da raiz do seu grupo de quase
+        duplicatas. 'embs' (o mmap do cache) só é lido para os membros de
+        baldes com colisão, na conferência pelo cosseno exato.
+        """
+        inicio = time.perf_counter()
+        n = self.total
+        uniao = UniaoBusca(n)
+        for a, b in self.iguais:
+            uniao.unir(a, b)
+
+        comparacoes = 0
+        for membros in self.baldes():
+            # Membros já no mesmo grupo não precisam ser conferidos de novo
+            if len({uniao.raiz(i) for i in membros}) == 1:
+                continue
+            comparacoes += conferir_balde(embs, membros, uniao, limiar)
+
+        raizes = np.array([uniao.raiz(i) for i in range(n)], dtype=np.int64)
+        grupos = len(np.unique(raizes))
+        metricas.registrar_vazao("deduplicacao", n, time.perf_counter() - inicio)
+        metricas.definir("oasis_duplicatas_grupos", grupos, "Grupos de proposições quase idênticas (inclui isoladas)")
+        metricas.definir("oasis_duplicatas_comparacoes", comparacoes, "Pares conferidos pelo cosseno exato na última execução")
+        print(f" -> Duplicatas: {n} ementas em {grupos} grupos ({n - grupos} quase idênticas), "
+              f"{comparacoes} comparações (todos os pares seriam {n * (n - 1) // 2}).", flush=True)
+        return raizes
+
+
+def agrupar(embs, chaves=None, limiar=LIMIAR_DUPLICATA):
+    """Agrupa uma matriz inteira de uma vez (lida em blocos de TAMANHO_BLOCO)."""
+    indice = IndiceLSH()
+    for inicio in range(0, embs.shape[0], TAMANHO_BLOCO):
+        fim = inicio + TAMANHO_BLOCO
+        indice.adicionar(embs[inicio:fim], None if chaves is None else chaves[inicio:fim])
+    return indice.agrupar(embs, limiar)
+
+
+def ids_de_grupo(db, raizes, linhas):
+    """
+    Identificador estável do grupo de cada uma das 'linhas': a proposição mais
+    antiga do grupo ('Casa-id'), que não muda quando o corpus cresce ou é
+    reordenado. O representante é escolhido entre todo o corpus.
+    """
+    representante = {}
+    for i, raiz in enumerate(raizes.tolist()):
+        atual = representante.get(raiz)
+        chave = (db[i].get('dataApresentacao') or '9999', i)
+        if atual is None or chave < atual[0]:
+            representante[raiz] = (chave, i)
+
+    ids = {}
+    for raiz, (_, i) in representante.items():
+        p = db[i]
+        ids[raiz] = f"{p.get('casa', '')}-{p.get('id')}"
+    return [ids[int(raizes[i])] for i in linhas]
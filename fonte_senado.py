@@ -0,0 +1,186 @@
+from datetime import timedelta
+
+# =============================================================================
+# COLETA DO SENADO FEDERAL (API DE DADOS ABERTOS DO SENADO)
+# =============================================================================
+# Busca as matérias por janelas de datas em /materia/pesquisa/lista e completa
+# cada uma com /materia/{codigo} (indexação, autoria e situação). O resultado é
+# normalizado para o MESMO formato de registro da coleta da Câmara (siglaTipo,
+# numero, ano, ementa, keywords, statusProposicao, autor_principal_*...), de
+# modo que a filtragem e a carga não precisam saber de qual casa veio o dado.
+#
+# A API do Senado já mudou o formato do JSON algumas vezes; os campos são lidos
+# de forma defensiva, aceitando tanto o formato "IdentificacaoMateria /
+# DadosBasicosMateria" quanto o formato plano (Codigo, Sigla, Numero, Ementa...).
+
+URL_PAGINA_MATERIA = "https://www25.senado.leg.br/web/atividade/materias/-/materia/{codigo}"
+CABECALHOS = {"Accept": "application/json"}
+# Trechos da situação que indicam tramitação encerrada (não precisam ser relidas)
+SITUACOES_ENCERRADAS = ("ARQUIVAD", "TRANSFORMADA EM NORMA", "REJEITAD", "RETIRAD", "PREJUDICAD", "VETAD")
+
+
+def como_lista(valor):
+    """A API devolve objeto único quando há um só item e lista quando há vários."""
+    if valor is None:
+        return []
+    return valor if isinstance(valor, list) else [valor]
+
+
+def primeiro(dados, *caminhos, padrao=""):
+    """Primeiro valor não vazio entre caminhos como 'DadosBasicosMateria.EmentaMateria'."""
+    for caminho in caminhos:
+        atual = dados
+        for chave in caminho.split("."):
+            atual = atual.get(chave) if isinstance(atual, dict) else None
+            if atual is None:
+                break
+        if atual not in (None, "", [], {}):
+            return atual
+    return padrao
+
+
+def listar_materias(session, base_url, dt_inicio, dt_fim, tipos):
+    materias = {}
+    curr = dt_inicio
+    print(f"\n[SENADO] Buscando matérias de {dt_inicio.date()} até {dt_fim.date()}...", flush=True)
+
+    while curr < dt_fim:
+        next_date = curr + timedelta(days=60)  # Mesmas janelas da coleta da Câmara
+        if next_date > dt_fim: next_date = dt_fim
+
+        for sigla in tipos:
+            params = {
+                "sigla": sigla,
+                "dataInicioApresentacao": curr.strftime("%Y%m%d"),
+                "dataFimApresentacao": next_date.strftime("%Y%m%d"),
+            }
+            try:
+                r = session.get(f"{base_url}/materia/pesquisa/lista.json", params=params,
+                                headers=CABECALHOS, timeout=20)
+                r.raise_for_status()
+                data = r.json()
+            except Exception as e:
+                print(f"    Erro na pesquisa do Senado ({sigla}): {e}")
+                continue
+
+            lista = primeiro(data, "PesquisaBasicaMateria.Materias.Materia", padrao=[])
+            for m in como_lista(lista):
+                codigo = primeiro(m, "IdentificacaoMateria.CodigoMateria", "Codigo", "CodigoMateria")
+                if codigo:
+                    materias[str(codigo)] = m
+        curr = next_date + timedelta(days=1)
+
+    return list(materias.items())
+
+
+def situacao_atual(detalhe):
+    autuacoes = primeiro(detalhe, "SituacaoAtual.Autuacoes.Autuacao", padrao=[])
+    for autuacao in como_lista(autuacoes):
+        situacoes = como_lista(primeiro(autuacao, "Situacoes.Situacao", padrao=[]))
+        situacao = situacoes[-1] if situacoes else primeiro(autuacao, "Situacao", padrao={})
+        if situacao:
+            return {
+                "descricaoTramitacao": primeiro(autuacao, "DescricaoLocal", "Local.NomeLocal"),
+                "dataHora": primeiro(situacao, "DataSituacao", "Data"),
+                "descricaoSituacao": primeiro(situacao, "DescricaoSituacao", "Descricao"),
+            }
+    return {
+        "descricaoTramitacao": primeiro(detalhe, "SituacaoAtual.DescricaoLocal"),
+        "dataHora": primeiro(detalhe, "SituacaoAtual.DataSituacao"),
+        "descricaoSituacao": primeiro(detalhe, "SituacaoAtual.DescricaoSituacao"),
+    }
+
+
+def autores(detalhe, resumo):
+    """Lista [(nome, partido)] a partir da autoria detalhada ou do texto do resumo."""
+    lista = []
+    for a in como_lista(primeiro(detalhe, "Autoria.Autor", "AutoresPrincipais.AutorPrincipal",
+                                 "Autor", padrao=[])):
+        if isinstance(a, dict):
+            nome = primeiro(a, "NomeAutor", "Nome")
+            partido = primeiro(a, "IdentificacaoParlamentar.SiglaPartidoParlamentar", "SiglaPartido", padrao="S/P")
+            if nome:
+                lista.append((nome, partido))
+    if not lista:
+        texto = primeiro(resumo, "Autor", "AutoresPrincipais.AutorPrincipal.NomeAutor")
+        if isinstance(texto, str) and texto:
+            lista.append((texto, "S/P"))
+    return lista
+
+
+def normalizar_materia(codigo, resumo, detalhe):
+    """Converte uma matéria do Senado no formato de registro usado pela coleta da Câmara."""
+    fonte = {**resumo, **detalhe}
+    sigla = primeiro(fonte, "IdentificacaoMateria.SiglaSubtipoMateria", "Sigla", "SiglaMateria")
+    lista_autores = autores(detalhe, resumo)
+
+    return {
+        "id": int(codigo) if str(codigo).isdigit() else codigo,
+        "siglaTipo": sigla,
+        "numero": primeiro(fonte, "IdentificacaoMateria.NumeroMateria", "Numero"),
+        "ano": primeiro(fonte, "IdentificacaoMateria.AnoMateria", "Ano"),
+        "descricaoTipo": primeiro(fonte, "IdentificacaoMateria.DescricaoSubtipoMateria", "DescricaoSubtipo", padrao=sigla),
+        "ementa": primeiro(fonte, "DadosBasicosMateria.EmentaMateria", "Ementa"),
+        "keywords": primeiro(fonte, "DadosBasicosMateria.IndexacaoMateria", "Indexacao"),
+        "dataApresentacao": str(primeiro(fonte, "DadosBasicosMateria.DataApresentacao", "Data", "DataApresentacao")),
+        "urlInteiroTeor": primeiro(fonte, "UrlTexto", "Textos.Texto.UrlTexto"),
+        "url_pagina_web_oficial": URL_PAGINA_MATERIA.format(codigo=codigo),
+        "statusProposicao": situacao_atual(detalhe),
+        "autor_principal_nome": lista_autores[0][0] if lista_autores else "Desconhecido",
+        "autor_principal_partido": lista_autores[0][1] if lista_autores else "S/P",
+        "coautores_nomes": [nome for nome, _ in lista_autores[1:]],
+    }
+
+
+def coletar_senado(session, base_url, dt_inicio, dt_fim, tipos):
+    materias = listar_materias(session, base_url, dt_inicio, dt_fim, tipos)
+    total = len(materias)
+    resultados = []
+
+    print(f"\n[SENADO] Obtendo detalhes de {total} matérias...", flush=True)
+    for i, (codigo, resumo) in enumerate(materias):
+        if (i + 1) % 50 == 0:
+            print(f" -> Senado: {i + 1}/{total}", flush=True)
+
+        detalhe = {}
+        try:
+            r = session.get(f"{base_url}/materia/{codigo}.json", headers=CABECALHOS, timeout=10)
+            if r.status_code == 200:
+                detalhe = primeiro(r.json(), "DetalheMateria.Materia", padrao={})
+        except Exception as e:
+            print(f"Erro matéria {codigo}: {e}")
+
+        resultados.append(normalizar_materia(codigo, resumo, detalhe))
+
+    return resultados
+
+
+def em_tramitacao(registro):
+    situacao = str((registro.get("statusProposicao") or {}).get("descricaoSituacao") or "").upper()
+    return not any(trecho in situacao for trecho in SITUACOES_ENCERRADAS)
+
+
+def vazio(valor):
+    if isinstance(valor, dict):
+        return not any(valor.values())
+    return valor in ("", None, [], "Desconhecido", "S/P")
+
+
+def revisar_materias(session, base_url, registros):
+    """Relê o detalhe de matérias já coletadas; campos ausentes no detalhe mantêm o valor anterior."""
+    revisados = []
+    for i, antigo in enumerate(registros):
+        if (i + 1) % 50 == 0:
+            print(f" -> Senado (revisão): {i + 1}/{len(registros)}", flush=True)
+        codigo = antigo.get("id")
+        try:
+            r = session.get(f"{base_url}/materia/{codigo}.json", headers=CABECALHOS, timeout=10)
+            r.raise_for_status()
+            detalhe = primeiro(r.json(), "DetalheMateria.Materia", padrao={})
+        except Exception as e:
+            print(f"Erro matéria {codigo}: {e}")
+            continue
+        if detalhe:
+            novo = normalizar_materia(codigo, {}, detalhe)
+            revisados.append({**antigo, **{k: v for k, v in novo.items() if not vazio(v)}})
+    return revisados
@@ -1,13 +1,20 @@
-import mysql.connector
-import csv
-import datetime
+import time
 
-cnx = mysql.connector.connect(user='root', password=' ', host='localhost', database='Oasis')
-cursor = cnx.cursor()
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
-# Mapeia Nomes do CSV (Chave) para Nomes do Banco (Valor)
+import metricas
+from armazenamento import obter_backend
+
+# Mapeia Nomes do arquivo Parquet (Chave) para Nomes do Banco (Valor)
 column_map = {
     "Norma": "norma",
+    "Casa": "casa",
+    "Similaridade Semantica": "similaridade",
+    "Score Semantico": "score_semantico",
+    "Boost Keyword": "boost_keyword",
+    "Score Inteiro Teor": "score_inteiro_teor",
     "Descricao da Sigla": "descricao",
     'Data de Apresentacao': 'datadeapresentacao',
     "Autor": "autor",
@@ -18,72 +25,66 @@ column_map = {
     "Indexacao": "indexacao",
     "Último Estado": "ultimoestado",
     "Data Último Estado": "dataultimo",
-    "Situação": "situacao"
+    "Situação": "situacao",
+    "Grupo Duplicatas": "cluster_id"
 }
 
-csv_file_path = './projetos_em_csv/proposicoes_camara_resumo.csv'
+parquet_file_path = './projetos_em_csv/proposicoes_camara_resumo.parquet'
+TAMANHO_LOTE = 1000
 
-with open(csv_file_path, mode='r', encoding='utf-8') as csvfile:
-    reader = csv.reader(csvfile)
-    header = next(reader) # Contém os nomes originais do CSV
 
-    # Remove a coluna 'Similaridade Semantica'
-    if 'Similaridade Semantica' in header:
-        index_to_remove = header.index('Similaridade Semantica')
-        header.pop(index_to_remove)
-    else:
-        index_to_remove = None
+def vazio_para_nulo(coluna):
+    """Strings vazias viram NULL no banco (mesmo tratamento do antigo CSV)."""
+    if pa.types.is_string(coluna.type):
+        return pc.if_else(pc.equal(coluna, ""), pa.scalar(None, coluna.type), coluna)
+    return coluna
 
-    # Mapeia os nomes do CSV para os nomes do banco
-    # A variável 'header' (original) ainda será usada para encontrar os índices
-    mapped_columns = [column_map.get(col, col) for col in header]
 
-    columns = ','.join([f"`{col}`" for col in mapped_columns])
-    placeholders = ','.join(['%s'] * len(mapped_columns))
-    sql = f"INSERT INTO Projetos ({columns}) VALUES ({placeholders})"
+def iterar_lotes(caminho, tamanho_lote=TAMANHO_LOTE):
+    """
+    Lê o Parquet em lotes (memory-map, sem reparse de texto) e entrega
+    RecordBatches já com os nomes de coluna do banco. Datas chegam como date32
+    e scores como float64.
+    """
+    arquivo = pq.ParquetFile(caminho, memory_map=True)
 
-    
-    # Índice para 'Data de Apresentacao'
-    try:
-        date_index_apresentacao = header.index('Data de Apresentacao')
-    except ValueError:
-        print("Aviso: Coluna 'Data de Apresentacao' não encontrada.")
-        date_index_apresentacao = -1
+    # Apenas colunas conhecidas pelo banco são carregadas
+    colunas = [col for col in arquivo.schema_arrow.names if col in column_map]
+    mapped_columns = [column_map[col] for col in colunas]
 
-    # Índice para 'Data Último Estado'
-    try:
-        date_index_ultimo = header.index('Data Último Estado')
-    except ValueError:
-        print("Aviso: Coluna 'Data Último Estado' não encontrada.")
-        date_index_ultimo = -1
+    for batch in arquivo.iter_batches(batch_size=tamanho_lote, columns=colunas):
+        arrays = [vazio_para_nulo(batch.column(i)) for i in range(batch.num_columns)]
+        yield pa.RecordBatch.from_arrays(arrays, names=mapped_columns)
 
-    for row in reader:
-        if index_to_remove is not None:
-            row.pop(index_to_remove)  # remove o valor da coluna
 
-        values = [None if val == '' else val for val in row]
-        
-        # Converte a 'Data de Apresentacao'
-        if date_index_apresentacao != -1 and values[date_index_apresentacao]:
-            try:
-                parsed_date = datetime.datetime.strptime(values[date_index_apresentacao], '%Y-%m-%d')
-                values[date_index_apresentacao] = parsed_date.strftime('%Y-%m-%d')
-            except (ValueError, TypeError):
-                values[date_index_apresentacao] = None
+def carregar_parquet(backend, caminho=parquet_file_path, tamanho_lote=TAMANHO_LOTE):
+    """
+    Substitui o conteúdo de Projetos pelas linhas do Parquet. A carga vai para
+    a tabela sombra (Projetos_novo) e só então é publicada por RENAME, então o
+    dashboard nunca vê a tabela vazia ou pela metade.
+    """
+    cnx = backend.conectar_carga()
+    total = lidas = 0
+    inicio = time.perf_counter()
+    try:
+        sombra = backend.criar_tabela_sombra(cnx, "Projetos")
+        for batch in iterar_lotes(caminho, tamanho_lote):
+            lidas += batch.num_rows
+            total += backend.inserir_lote(cnx, sombra, batch)
+        cnx.commit()
+        backend.publicar_tabela_sombra(cnx, "Projetos", total)
+    finally:
+        cnx.close()
+    if total < lidas:
+        print(f"[AVISO] {lidas - total} de {lidas} linhas ignoradas por violarem restrições do schema.", flush=True)
+    metricas.registrar_vazao(f"insercao_{backend.nome}", total, time.perf_counter() - inicio)
+    return total
 
-        # Converte a 'Data Último Estado'
-        if date_index_ultimo != -1 and values[date_index_ultimo]:
-            try:
-                parsed_date = datetime.datetime.strptime(values[date_index_ultimo], '%Y-%m-%d')
-                values[date_index_ultimo] = parsed_date.strftime('%Y-%m-%d')
-            except (ValueError, TypeError):
-                values[date_index_ultimo] = None
-        
-        try:
-            cursor.execute(sql, values)
-        except mysql.connector.errors.IntegrityError:
-            pass
 
-cnx.commit()
-cursor.close()
-cnx.close()
\ No newline at end of file
+if __name__ == "__main__":
+    metricas.configurar("insert_data")
+    backend = obter_backend()
+    with metricas.medir_etapa("insercao"):
+        total = carregar_parquet(backend)
+    print(f"{total} linhas inseridas em Projetos ({backend.nome}).")
+    metricas.exportar_prometheus()
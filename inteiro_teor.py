@@ -0,0 +1,301 @@
+import hashlib
+import html
+import io
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import metricas
+
+# =============================================================================
+# INTEIRO TEOR DAS PROPOSIÇÕES (DOWNLOAD, TRECHOS E EMBEDDINGS INCREMENTAIS)
+# =============================================================================
+# Etapa opcional da filtragem (config.INTEIRO_TEOR_ATIVO). A ementa é curta e
+# nem sempre cita o tema; o texto completo (urlInteiroTeor) é:
+#   1. baixado em paralelo uma única vez por URL e guardado como texto puro em
+#      <pasta>/textos (falhas só são tentadas de novo depois de FALHA_TTL);
+#   2. dividido em trechos de PALAVRAS_POR_TRECHO palavras, com sobreposição,
+#      do tamanho que o modelo consegue ler (128 tokens);
+#   3. codificado em lotes de DOCUMENTOS_POR_FRAGMENTO documentos: cada lote vira
+#      um fragmento .npy (float16, vetores normalizados) e o índice guarda as
+#      linhas de cada documento;
+#   4. pontuado pelo melhor trecho (maior cosseno com a consulta).
+# Só URLs novas são baixadas e só documentos novos são codificados; o pico de
+# memória depende do tamanho do lote, não do corpus. Os textos independem do
+# modelo: trocar MODELO_NOME só recodifica os trechos.
+
+PALAVRAS_POR_TRECHO = 80
+SOBREPOSICAO_TRECHO = 20
+MAX_TRECHOS_POR_DOCUMENTO = 64
+MAX_PAGINAS_PDF = 60
+MAX_BYTES_DOCUMENTO = 20 * 1024 * 1024
+DOCUMENTOS_POR_FRAGMENTO = 256
+MAX_FRAGMENTOS = 32  # acima disso os fragmentos são compactados em um só
+LINHAS_POR_BLOCO = 65536
+FALHA_TTL = 7 * 24 * 3600
+
+
+def chave_documento(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+
+def extrator_pdf_disponivel():
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def extrair_texto(conteudo, tipo_conteudo="", codificacao=None):
+    """Texto puro de um PDF (pypdf), HTML ou texto simples."""
+    if conteudo[:5] == b"%PDF-" or "pdf" in tipo_conteudo:
+        from pypdf import PdfReader
+        leitor = PdfReader(io.BytesIO(conteudo))
+        return "\n".join(pagina.extract_text() or "" for pagina in leitor.pages[:MAX_PAGINAS_PDF])
+
+    texto = conteudo.decode(codificacao or "utf-8", errors="replace")
+    if "html" in tipo_conteudo or texto.lstrip()[:1] == "<":
+        texto = re.sub(r"<(script|style)\b.*?</\1>", " ", texto, flags=re.S | re.I)
+        texto = html.unescape(re.sub(r"<[^>]+>", " ", texto))
+    return texto
+
+
+def dividir_em_trechos(texto, limpar=None):
+    """Janelas de PALAVRAS_POR_TRECHO palavras que se sobrepõem em SOBREPOSICAO_TRECHO."""
+    palavras = (limpar(texto) if limpar else texto).split()
+    passo = PALAVRAS_POR_TRECHO - SOBREPOSICAO_TRECHO
+    trechos = [" ".join(palavras[i:i + PALAVRAS_POR_TRECHO])
+               for i in range(0, max(len(palavras) - SOBREPOSICAO_TRECHO, 1), passo)]
+    return [t for t in trechos if t][:MAX_TRECHOS_POR_DOCUMENTO]
+
+
+def salvar_matriz(caminho, matriz):
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        np.save(f, matriz)
+    os.replace(temporario, caminho)
+
+
+class CacheInteiroTeor:
+    def __init__(self, pasta, modelo):
+        self.pasta = pasta
+        self.pasta_textos = os.path.join(pasta, "textos")
+        self.caminho_indice = os.path.join(pasta, "indice.json")
+        self.modelo = modelo
+        self.proximo_fragmento = 0
+        self.documentos = {}  # chave -> {"status", "atualizado_em", "fragmento", "inicio", "fim"}
+        os.makedirs(self.pasta_textos, exist_ok=True)
+        self.carregar()
+
+    # --- Persistência ---
+    def carregar(self):
+        if not os.path.exists(self.caminho_indice):
+            return
+        try:
+            with open(self.caminho_indice, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[INTEIRO TEOR] Índice inválido, recomeçando do zero: {e}")
+            return
+        self.documentos = dados.get("documentos", {})
+        self.proximo_fragmento = dados.get("proximo_fragmento", 0)
+
+        if dados.get("modelo") != self.modelo:
+            print(f"[INTEIRO TEOR] Modelo mudou ({dados.get('modelo')} -> {self.modelo}); "
+                  f"os trechos serão recodificados.", flush=True)
+            for doc in self.documentos.values():
+                for campo in ("fragmento", "inicio", "fim"):
+                    doc.pop(campo, None)
+
+    def salvar(self):
+        dados = {"modelo": self.modelo, "proximo_fragmento": self.proximo_fragmento,
+                 "documentos": self.documentos}
+        temporario = self.caminho_indice + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho_indice)
+
+    def caminho_texto(self, chave):
+        return os.path.join(self.pasta_textos, chave + ".txt")
+
+    def ler_texto(self, chave):
+        try:
+            with open(self.caminho_texto(chave), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    # --- 1. Download concorrente ---
+    def pendentes(self, urls):
+        agora = time.time()
+        faltam = []
+        for url in sorted(set(urls)):
+            doc = self.documentos.get(chave_documento(url))
+            if doc is None or (doc["status"] == "falha" and agora - doc["atualizado_em"] > FALHA_TTL):
+                faltam.append(url)
+        return faltam
+
+    def baixar_documento(self, session, url):
+        """Baixa e extrai um documento; grava o texto e devolve (chave, entrada do índice)."""
+        chave = chave_documento(url)
+        try:
+            # Em fluxo: documentos acima do limite são abandonados sem serem lidos inteiros
+            with session.get(url, timeout=30, stream=True) as r:
+                r.raise_for_status()
+                conteudo = bytearray()
+                for pedaco in r.iter_content(chunk_size=64 * 1024):
+                    conteudo += pedaco
+                    if len(conteudo) > MAX_BYTES_DOCUMENTO:
+                        raise ValueError(f"documento com mais de {MAX_BYTES_DOCUMENTO} bytes")
+                texto = extrair_texto(bytes(conteudo), r.headers.get("Content-Type", ""), r.encoding)
+        except Exception as e:
+            return chave, {"status": "falha", "erro": str(e)[:200], "atualizado_em": time.time()}
+
+        temporario = self.caminho_texto(chave) + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(temporario, self.caminho_texto(chave))
+        return chave, {"status": "texto", "caracteres": len(texto), "atualizado_em": time.time()}
+
+    def baixar(self, session, urls, trabalhadores):
+        faltam = self.pendentes(urls)
+        metricas.incrementar("oasis_cache_total", len(set(urls)) - len(faltam), "Acessos a caches (hit/miss)",
+                             cache="inteiro_teor", resultado="hit")
+        metricas.incrementar("oasis_cache_total", len(faltam), "Acessos a caches (hit/miss)",
+                             cache="inteiro_teor", resultado="miss")
+        if not faltam:
+            print(" -> Inteiro teor: todos os documentos já estão em cache.", flush=True)
+            return 0
+
+        print(f" -> Inteiro teor: baixando {len(faltam)} documentos ({trabalhadores} em paralelo)...", flush=True)
+        inicio = time.perf_counter()
+        baixados = 0
+        tamanho_lote = trabalhadores * 8
+        with ThreadPoolExecutor(max_workers=trabalhadores) as executor:
+            for i in range(0, len(faltam), tamanho_lote):
+                lote = faltam[i:i + tamanho_lote]
+                for chave, entrada in executor.map(lambda url: self.baixar_documento(session, url), lote):
+                    self.documentos[chave] = entrada
+                    baixados += entrada["status"] == "texto"
+                # O progresso fica no índice: uma interrupção não perde o que já foi baixado
+                self.salvar()
+                print(f" -> Inteiro teor: {i + len(lote)}/{len(faltam)}", flush=True)
+
+        metricas.registrar_vazao("download_inteiro_teor", len(faltam), time.perf_counter() - inicio)
+        print(f" -> {baixados} textos extraídos, {len(faltam) - baixados} falhas.", flush=True)
+        return baixados
+
+    # --- 2/3. Trechos e embeddings em fragmentos ---
+    def codificar(self, model, limpar=None):
+        novos = sorted(c for c, d in self.documentos.items() if d["status"] == "texto" and "fragmento" not in d)
+        if not novos:
+            return 0
+
+        print(f" -> Inteiro teor: codificando os trechos de {len(novos)} documentos...", flush=True)
+        inicio = time.perf_counter()
+        total_trechos = 0
+        for i in range(0, len(novos), DOCUMENTOS_POR_FRAGMENTO):
+            trechos, limites = [], []
+            for chave in novos[i:i + DOCUMENTOS_POR_FRAGMENTO]:
+                partes = dividir_em_trechos(self.ler_texto(chave), limpar)
+                limites.append((chave, len(trechos), len(trechos) + len(partes)))
+                trechos.extend(partes)
+
+            nome = None
+            if trechos:
+                embs = model.encode(trechos, batch_size=32, show_progress_bar=False, normalize_embeddings=True)
+                nome = f"trechos_{self.proximo_fragmento:05d}.npy"
+                self.proximo_fragmento += 1
+                salvar_matriz(os.path.join(self.pasta, nome), np.asarray(embs, dtype=np.float16))
+
+            # Documentos sem texto aproveitável ficam com fragmento None (não são recodificados)
+            for chave, a, b in limites:
+                self.documentos[chave].update(fragmento=nome if b > a else None, inicio=a, fim=b)
+            self.salvar()
+            total_trechos += len(trechos)
+
+        metricas.registrar_vazao("encoding_trechos", total_trechos, time.perf_counter() - inicio)
+        print(f" -> {total_trechos} trechos codificados.", flush=True)
+        self.compactar()
+        self.remover_fragmentos_orfaos()
+        return total_trechos
+
+    def documentos_por_fragmento(self):
+        grupos = defaultdict(list)
+        for chave, doc in self.documentos.items():
+            if doc.get("fragmento"):
+                grupos[doc["fragmento"]].append((doc["inicio"], doc["fim"], chave))
+        for docs in grupos.values():
+            docs.sort()
+        return grupos
+
+    def compactar(self):
+        """Junta os fragmentos em um só quando passam de MAX_FRAGMENTOS (cópia por mmap)."""
+        grupos = self.documentos_por_fragmento()
+        if len(grupos) <= MAX_FRAGMENTOS:
+            return
+
+        total = sum(b - a for docs in grupos.values() for a, b, _ in docs)
+        dimensao = np.load(os.path.join(self.pasta, next(iter(grupos))), mmap_mode='r').shape[1]
+        nome = f"trechos_{self.proximo_fragmento:05d}.npy"
+        self.proximo_fragmento += 1
+        temporario = os.path.join(self.pasta, nome + ".tmp")
+        destino = np.lib.format.open_memmap(temporario, mode='w+', dtype=np.float16, shape=(total, dimensao))
+
+        novas_linhas = {}
+        linha = 0
+        for nome_antigo, docs in sorted(grupos.items()):
+            origem = np.load(os.path.join(self.pasta, nome_antigo), mmap_mode='r')
+            for a, b, chave in docs:
+                destino[linha:linha + b - a] = origem[a:b]
+                novas_linhas[chave] = (linha, linha + b - a)
+                linha += b - a
+            del origem
+
+        destino.flush()
+        del destino
+        os.replace(temporario, os.path.join(self.pasta, nome))
+        for chave, (a, b) in novas_linhas.items():
+            self.documentos[chave].update(fragmento=nome, inicio=a, fim=b)
+        self.salvar()
+        print(f" -> Inteiro teor: {len(grupos)} fragmentos compactados em '{nome}'.", flush=True)
+
+    def remover_fragmentos_orfaos(self):
+        em_uso = set(self.documentos_por_fragmento())
+        for nome in os.listdir(self.pasta):
+            if re.fullmatch(r"trechos_\d+\.npy(\.tmp)?", nome) and nome not in em_uso:
+                os.remove(os.path.join(self.pasta, nome))
+
+    # --- 4. Score pelo melhor trecho ---
+    def pontuar(self, consulta):
+        """{chave do documento: maior cosseno entre a consulta e um de seus trechos}."""
+        consulta = np.asarray(consulta, dtype=np.float32).ravel()
+        consulta = consulta / (np.linalg.norm(consulta) or 1.0)
+
+        scores = {}
+        for nome, docs in self.documentos_por_fragmento().items():
+            matriz = np.load(os.path.join(self.pasta, nome), mmap_mode='r')
+            # Máximo corrente por documento: a memória não cresce com o tamanho do fragmento
+            inicios = np.array([a for a, _, _ in docs], dtype=np.int64)
+            fins = np.array([b for _, b, _ in docs], dtype=np.int64)
+            melhores = np.full(len(docs), -np.inf, dtype=np.float32)
+            for inicio in range(0, matriz.shape[0], LINHAS_POR_BLOCO):
+                bloco = np.asarray(matriz[inicio:inicio + LINHAS_POR_BLOCO], dtype=np.float32)
+                sims = bloco @ consulta
+                fim = inicio + len(bloco)
+                # Só os documentos cujas linhas cruzam este bloco
+                for j in range(np.searchsorted(fins, inicio, side='right'), np.searchsorted(inicios, fim)):
+                    a, b = max(inicios[j], inicio) - inicio, min(fins[j], fim) - inicio
+                    if b > a:
+                        melhores[j] = max(melhores[j], sims[a:b].max())
+            for (_, _, chave), melhor in zip(docs, melhores.tolist()):
+                if melhor > -np.inf:
+                    scores[chave] = melhor
+            del matriz
+        return scores
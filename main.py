@@ -1,17 +1,19 @@
 import subprocess
 import os
 import shutil
-import mysql.connector
 import sys
 import time
 
-# --- CONFIGURAÇÃO GLOBAL DE CAMINHOS ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+import metricas
+from config import BASE_DIR, INTEIRO_TEOR_ATIVO
+from armazenamento import obter_backend
+from pipeline import Etapa, Pipeline, hash_conteudo_arquivo
 
-# --- CONFIGURAÇÃO DO BANCO DE DADOS ---
-DB_HOST = "localhost"
-DB_USER = "root"
-DB_PASSWORD = " "
+import acess_api
+import duplicatas
+import insert_data
+
+ARQUIVO_ESTADO_PIPELINE = "pipeline_estado.json"
 
 def obter_caminho(nome_arquivo):
     """Retorna o caminho completo compatível com o sistema operacional"""
@@ -20,9 +22,9 @@ def obter_caminho(nome_arquivo):
 def garantir_estrutura_pastas():
     """Verifica e cria as pastas necessárias para o projeto rodar"""
     print("\n>>> [0/4] Verificando estrutura de pastas...")
-    
+
     pasta_csv = obter_caminho("projetos_em_csv")
-    
+
     if not os.path.exists(pasta_csv):
         try:
             os.makedirs(pasta_csv)
@@ -32,77 +34,114 @@ def garantir_estrutura_pastas():
     else:
         print(f"Pasta já existe: {pasta_csv}")
 
-def executar_api():
+# =============================================================================
+# ETAPAS DO PIPELINE
+# =============================================================================
+def executar_coleta():
     print("\n>>> [1/4] Coletando dados da API (acess_api.py)...")
-    
-    script_path = obter_caminho("acess_api.py")
-    
-    # Executa o script
-    subprocess.run([sys.executable, script_path], check=True, cwd=BASE_DIR)
-    
-    # Movimentação do arquivo
-    arquivo_gerado = obter_caminho("proposicoes_camara_resumo.csv")
+    acess_api.carregar_ou_coletar()
+
+def executar_filtragem():
+    print("\n>>> [1/4] Filtrando proposições (acess_api.py)...")
+    acess_api.executar_etapa_filtragem()
+    mover_saidas_filtragem()
+
+def mover_saidas_filtragem():
+    # Movimentação dos arquivos (Parquet principal + CSV opcional)
     pasta_destino = obter_caminho("projetos_em_csv")
-    destino_final = os.path.join(pasta_destino, "proposicoes_camara_resumo.csv")
-    
-    if os.path.exists(arquivo_gerado):
-        # Remove versão antiga se existir para evitar conflito
-        if os.path.exists(destino_final):
-            os.remove(destino_final)
-
-        shutil.move(arquivo_gerado, destino_final)
-        print(f"Arquivo CSV movido para: {destino_final}")
-    else:
-        print("AVISO: O arquivo CSV não foi gerado pela API (ou foi salvo em outro lugar).")
+    for nome_arquivo, obrigatorio in [(acess_api.NOME_ARQUIVO_SAIDA_FINAL, True),
+                                      (acess_api.NOME_ARQUIVO_SAIDA_FINAL_CSV, False)]:
+        arquivo_gerado = obter_caminho(nome_arquivo)
+        destino_final = os.path.join(pasta_destino, nome_arquivo)
+
+        if os.path.exists(arquivo_gerado):
+            # Remove versão antiga se existir para evitar conflito
+            if os.path.exists(destino_final):
+                os.remove(destino_final)
+
+            shutil.move(arquivo_gerado, destino_final)
+            print(f"Arquivo movido para: {destino_final}")
+        elif obrigatorio:
+            print(f"AVISO: O arquivo {nome_arquivo} não foi gerado pela API (ou foi salvo em outro lugar).")
 
 def recriar_banco():
-    print("\n>>> [2/4] Recriando Banco de Dados (create_database.sql)...")
-    
-    arquivo_sql = obter_caminho("create_database.sql")
+    backend = obter_backend()
+    print(f"\n>>> [2/4] Recriando Banco de Dados ({backend.arquivo_schema}, backend: {backend.nome})...")
+
+    arquivo_sql = obter_caminho(backend.arquivo_schema)
 
     if not os.path.exists(arquivo_sql):
         print(f"Erro: Arquivo não encontrado: {arquivo_sql}")
         return
 
-    with open(arquivo_sql, "r", encoding="utf-8") as f:
-        sql_script = f.read()
-
     try:
-        cnx = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
-        cursor = cnx.cursor()
-        
-        commands = sql_script.split(';')
-        
-        for command in commands:
-            if command.strip():
-                try:
-                    cursor.execute(command)
-                except mysql.connector.Error as err:
-                    # Ignora erro se tentar apagar banco que não existe
-                    if err.errno == 1008: 
-                        pass
-                    else:
-                        print(f"Erro SQL: {err}")
-                        raise err
-            
-        cnx.commit()
-        cursor.close()
-        cnx.close()
+        backend.recriar_schema()
         print("Banco de dados 'Oasis' recriado com sucesso.")
-    except mysql.connector.Error as err:
-        print(f"Erro crítico de conexão ao MySQL: {err}")
+    except Exception as err:
+        print(f"Erro crítico ao recriar o banco ({backend.nome}): {err}")
         # Não usamos sys.exit aqui para permitir que o usuário veja o erro no final
         raise err
 
 def inserir_dados():
-    print("\n>>> [3/4] Inserindo dados no SQL (insert_data.py)...")
-    script_path = obter_caminho("insert_data.py")
-    
-    subprocess.run([sys.executable, script_path], check=True, cwd=BASE_DIR)
+    print("\n>>> [3/4] Inserindo dados no banco (insert_data.py)...")
+    caminho = obter_caminho(os.path.join("projetos_em_csv", acess_api.NOME_ARQUIVO_SAIDA_FINAL))
+    if not os.path.exists(caminho):
+        print(f"AVISO: {caminho} não existe; nada a inserir.")
+        return
+
+    backend = obter_backend()
+    total = insert_data.carregar_parquet(backend, caminho)
+    print(f"{total} linhas inseridas em Projetos ({backend.nome}).")
+
+def montar_pipeline():
+    """
+    DAG:   coleta ──> filtragem ──┐
+                                  ├──> insercao
+           schema ────────────────┘
+    'coleta' e 'schema' não dependem uma da outra e rodam em paralelo.
+    """
+    backend = obter_backend()
+    arquivos_corpus = [obter_caminho(fonte.arquivo_cache) for fonte in acess_api.fontes_ativas()]
+    arquivo_saida = obter_caminho(os.path.join("projetos_em_csv", acess_api.NOME_ARQUIVO_SAIDA_FINAL))
+
+    etapas = [
+        Etapa(
+            "coleta", executar_coleta,
+            entradas=lambda: {
+                "fontes": acess_api.FONTES_ATIVAS,
+                "camara_url": acess_api.CAMARA_BASE_URL,
+                "senado_url": acess_api.SENADO_BASE_URL,
+                "inicio": acess_api.DATA_INICIO_COLETA.date().isoformat(),
+                "tipos": acess_api.TIPOS_DOCUMENTO,
+            },
+            saidas=arquivos_corpus,
+        ),
+        Etapa(
+            "filtragem", executar_filtragem, dependencias=["coleta"],
+            entradas=lambda: {
+                "consulta": acess_api.CONSULTA_USUARIO,
+                "modelo": acess_api.MODELO_NOME,
+                "peso_semantico": acess_api.PESO_SEMANTICO,
+                "peso_keyword": acess_api.PESO_KEYWORD,
+                "piso": acess_api.PISO_CANDIDATOS,
+                "limiar_duplicata": duplicatas.LIMIAR_DUPLICATA,
+                "inteiro_teor": INTEIRO_TEOR_ATIVO,
+            },
+            saidas=[arquivo_saida],
+        ),
+        Etapa(
+            "schema", recriar_banco,
+            entradas=lambda: {
+                "backend": backend.nome,
+                "schema": hash_conteudo_arquivo(obter_caminho(backend.arquivo_schema)),
+            },
+        ),
+        Etapa(
+            "insercao", inserir_dados, dependencias=["filtragem", "schema"],
+            entradas=lambda: {"backend": backend.nome},
+        ),
+    ]
+    return Pipeline(etapas, obter_caminho(ARQUIVO_ESTADO_PIPELINE))
 
 def abrir_dashboard():
     print("\n>>> [4/4] Iniciando Dashboard (Streamlit)...")
@@ -110,37 +149,44 @@ def abrir_dashboard():
     print("O navegador deve abrir automaticamente.")
     print("Para parar, feche esta janela ou pressione Ctrl+C.")
     print("---------------------------------------------------------")
-    
+
     dashboard_path = obter_caminho("dashboard.py")
-    
+
     # Garante que estamos usando 'python.exe' (com janela) e não 'pythonw.exe' (sem janela)
     executavel_python = sys.executable.replace("pythonw.exe", "python.exe")
-    
+
     subprocess.run([executavel_python, "-m", "streamlit", "run", dashboard_path], check=True, cwd=BASE_DIR)
 
 if __name__ == "__main__":
     try:
         print(f"--- INICIANDO PIPELINE DE DADOS OASIS ---")
         print(f"Diretório base: {BASE_DIR}")
-        
+
+        # Os arquivos de cache do acess_api.py usam caminhos relativos
+        os.chdir(BASE_DIR)
+
         # 0. Estrutura
         garantir_estrutura_pastas()
-        
-        # 1. Coleta
-        executar_api()
-        
-        # 2. Banco
-        recriar_banco()
-        
-        # 3. Inserção
-        inserir_dados()
-        
+
+        # 1-3. Coleta, Filtragem, Banco e Inserção (pula etapas sem mudanças)
+        # Use "python main.py --forcar" para reexecutar todas as etapas
+        # Métricas: metricas/pipeline.prom e metricas/eventos.jsonl
+        metricas.configurar("pipeline")
+        inicio = time.perf_counter()
+        pipeline = montar_pipeline()
+        try:
+            pipeline.executar(forcar="--forcar" in sys.argv)
+        finally:
+            metricas.exportar_prometheus()
+        pipeline.imprimir_relatorio()
+        print(f" Total: {time.perf_counter() - inicio:.2f}s")
+
         # 4. Dashboard
         abrir_dashboard()
-        
+
     except Exception as e:
         print("\n\n#################################################")
         print("OCORREU UM ERRO DURANTE A EXECUÇÃO")
         print(f"Erro: {e}")
         print("#################################################")
-        input("\nPressione ENTER para fechar a janela...")
\ No newline at end of file
+        input("\nPressione ENTER para fechar a janela...")
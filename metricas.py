@@ -0,0 +1,279 @@
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+import config
+
+# =============================================================================
+# INSTRUMENTAÇÃO DO PIPELINE (MÉTRICAS + PERFIL)
+# =============================================================================
+# Registro em memória de contadores, gauges e histogramas, com rótulos no
+# estilo Prometheus. Cada medição relevante também vira um evento JSON lines
+# (config.METRICAS_EVENTOS) e o estado pode ser exportado no formato texto do
+# Prometheus (config.METRICAS_DIR/<componente>.prom, compatível com o
+# "textfile collector" do node_exporter).
+#
+# Perfil opcional: OASIS_PERFILAR="coleta,filtragem" (ou "todas") grava
+# perfil_<etapa>.prof (cProfile) para as etapas medidas com medir_etapa().
+# O perfil cobre também as threads criadas durante a etapa. Só um perfil fica
+# ativo por vez: no pipeline.py, em que etapas rodam em paralelo, é gravado um
+# único perfil_pipeline.prof com todas elas.
+#
+# O tempo de CPU por etapa (cpu_thread_s) é o da thread que chamou a etapa:
+# trabalho feito em ThreadPoolExecutor (coleta, downloads do inteiro teor)
+# não entra nele. Para essas etapas, o perfil acima é a medida de CPU.
+
+# Buckets de latência (segundos) para requisições HTTP e consultas
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    def __init__(self, buckets=BUCKETS_PADRAO):
+        self.buckets = tuple(buckets)
+        self.contagens = [0] * len(self.buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.soma += valor
+        self.total += 1
+        for i, limite in enumerate(self.buckets):
+            if valor <= limite:
+                self.contagens[i] += 1
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.contadores = {}
+        self.gauges = {}
+        self.histogramas = {}
+        self.ajudas = {}
+        self.componente = "oasis"
+
+    @staticmethod
+    def chave(nome, rotulos):
+        return (nome, tuple(sorted((k, str(v)) for k, v in rotulos.items())))
+
+    def incrementar(self, nome, valor=1, ajuda="", **rotulos):
+        with self.trava:
+            k = self.chave(nome, rotulos)
+            self.contadores[k] = self.contadores.get(k, 0) + valor
+            self.ajudas.setdefault(nome, ajuda)
+
+    def definir(self, nome, valor, ajuda="", **rotulos):
+        with self.trava:
+            self.gauges[self.chave(nome, rotulos)] = valor
+            self.ajudas.setdefault(nome, ajuda)
+
+    def observar(self, nome, valor, ajuda="", buckets=BUCKETS_PADRAO, **rotulos):
+        with self.trava:
+            k = self.chave(nome, rotulos)
+            if k not in self.histogramas:
+                self.histogramas[k] = Histograma(buckets)
+            self.histogramas[k].observar(valor)
+            self.ajudas.setdefault(nome, ajuda)
+
+    # --- Exportação ---
+    @staticmethod
+    def formatar_rotulos(rotulos, extra=()):
+        pares = list(rotulos) + list(extra)
+        if not pares:
+            return ""
+        def escapar(v):
+            return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        texto = ",".join(f'{k}="{escapar(v)}"' for k, v in pares)
+        return "{" + texto + "}"
+
+    def texto_prometheus(self):
+        linhas = []
+        with self.trava:
+            for tipo, tabela in (("counter", self.contadores), ("gauge", self.gauges)):
+                for nome in sorted({n for n, _ in tabela}):
+                    if self.ajudas.get(nome):
+                        linhas.append(f"# HELP {nome} {self.ajudas[nome]}")
+                    linhas.append(f"# TYPE {nome} {tipo}")
+                    for (n, rotulos), valor in sorted(tabela.items()):
+                        if n == nome:
+                            linhas.append(f"{nome}{self.formatar_rotulos(rotulos)} {valor}")
+
+            for nome in sorted({n for n, _ in self.histogramas}):
+                if self.ajudas.get(nome):
+                    linhas.append(f"# HELP {nome} {self.ajudas[nome]}")
+                linhas.append(f"# TYPE {nome} histogram")
+                for (n, rotulos), h in sorted(self.histogramas.items(), key=lambda item: item[0]):
+                    if n != nome:
+                        continue
+                    for limite, contagem in zip(h.buckets, h.contagens):
+                        linhas.append(f"{nome}_bucket{self.formatar_rotulos(rotulos, [('le', limite)])} {contagem}")
+                    linhas.append(f"{nome}_bucket{self.formatar_rotulos(rotulos, [('le', '+Inf')])} {h.total}")
+                    linhas.append(f"{nome}_sum{self.formatar_rotulos(rotulos)} {h.soma}")
+                    linhas.append(f"{nome}_count{self.formatar_rotulos(rotulos)} {h.total}")
+        return "\n".join(linhas) + "\n"
+
+
+METRICAS = RegistroMetricas()
+trava_eventos = threading.Lock()
+
+
+def configurar(componente):
+    """Define o nome do processo ('pipeline', 'dashboard'...) usado nos arquivos exportados."""
+    METRICAS.componente = componente
+
+
+def incrementar(nome, valor=1, ajuda="", **rotulos):
+    METRICAS.incrementar(nome, valor, ajuda, **rotulos)
+
+
+def definir(nome, valor, ajuda="", **rotulos):
+    METRICAS.definir(nome, valor, ajuda, **rotulos)
+
+
+def observar(nome, valor, ajuda="", **rotulos):
+    METRICAS.observar(nome, valor, ajuda, **rotulos)
+
+
+def registrar_evento(tipo, **dados):
+    """Acrescenta uma linha JSON em config.METRICAS_EVENTOS."""
+    if not config.METRICAS_ATIVAS:
+        return
+    evento = {"ts": round(time.time(), 3), "componente": METRICAS.componente, "tipo": tipo, **dados}
+    try:
+        os.makedirs(os.path.dirname(config.METRICAS_EVENTOS), exist_ok=True)
+        with trava_eventos, open(config.METRICAS_EVENTOS, "a", encoding="utf-8") as f:
+            f.write(json.dumps(evento, ensure_ascii=False, default=str) + "\n")
+    except OSError as e:
+        print(f"[METRICAS] Falha ao gravar evento: {e}")
+
+
+def exportar_prometheus(caminho=None):
+    if not config.METRICAS_ATIVAS:
+        return None
+    caminho = caminho or os.path.join(config.METRICAS_DIR, f"{METRICAS.componente}.prom")
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(METRICAS.texto_prometheus())
+    os.replace(temporario, caminho)  # leitores nunca veem arquivo pela metade
+    return caminho
+
+
+# --- Helpers de medição ---
+def registrar_vazao(operacao, registros, segundos):
+    """Registros por segundo de uma operação (encoding, inserts, coleta...)."""
+    vazao = registros / segundos if segundos > 0 else 0.0
+    definir("oasis_registros_por_segundo", round(vazao, 3), "Vazão da última execução da operação", operacao=operacao)
+    incrementar("oasis_registros_total", registros, "Registros processados", operacao=operacao)
+    registrar_evento("vazao", operacao=operacao, registros=registros, segundos=round(segundos, 6),
+                     registros_por_s=round(vazao, 3))
+
+
+def registrar_cache(cache, acerto):
+    incrementar("oasis_cache_total", 1, "Acessos a caches (hit/miss)", cache=cache,
+                resultado="hit" if acerto else "miss")
+
+
+def deve_perfilar(etapa):
+    etapas = [e.strip() for e in config.PERFILAR_ETAPAS.split(",") if e.strip()]
+    return "todas" in etapas or etapa in etapas
+
+
+_TRAVA_PERFIL = threading.Lock()
+
+
+@contextlib.contextmanager
+def perfilar(nome):
+    """
+    Grava perfil_<nome>.prof com a thread atual e todas as threads iniciadas
+    dentro do bloco. Um cProfile.Profile só enxerga a thread em que foi
+    ativado, então cada thread nova ativa o seu (threading.setprofile) e os
+    perfis são somados no final. Se outro perfil já está ativo (etapas em
+    paralelo ou aninhadas), o bloco roda sem perfil: ele já está no outro.
+    """
+    if not _TRAVA_PERFIL.acquire(blocking=False):
+        yield
+        return
+
+    perfis = [cProfile.Profile()]
+    trava_lista = threading.Lock()
+
+    def ativar_na_thread(*_):
+        perfil = cProfile.Profile()
+        with trava_lista:
+            perfis.append(perfil)
+        perfil.enable()  # substitui este gancho pelo profiler da própria thread
+
+    threading.setprofile(ativar_na_thread)
+    perfis[0].enable()
+    try:
+        yield
+    finally:
+        perfis[0].disable()
+        threading.setprofile(None)
+        try:
+            with trava_lista:
+                estatisticas = pstats.Stats(*perfis)
+            os.makedirs(config.METRICAS_DIR, exist_ok=True)
+            estatisticas.dump_stats(os.path.join(config.METRICAS_DIR, f"perfil_{nome}.prof"))
+        finally:
+            _TRAVA_PERFIL.release()
+
+
+@contextlib.contextmanager
+def medir_etapa(etapa):
+    """Mede wall/CPU (da thread chamadora) de uma etapa; com OASIS_PERFILAR, também grava um perfil cProfile."""
+    inicio_wall = time.perf_counter()
+    inicio_cpu = time.thread_time()
+    status = "ok"
+    try:
+        with perfilar(etapa) if deve_perfilar(etapa) else contextlib.nullcontext():
+            yield
+    except BaseException:
+        status = "erro"
+        raise
+    finally:
+        wall = time.perf_counter() - inicio_wall
+        cpu = time.thread_time() - inicio_cpu
+        definir("oasis_etapa_wall_segundos", round(wall, 6), "Tempo de parede da última execução da etapa", etapa=etapa)
+        definir("oasis_etapa_cpu_thread_segundos", round(cpu, 6),
+                "Tempo de CPU da thread que chamou a etapa (sem as threads de trabalho), última execução", etapa=etapa)
+        incrementar("oasis_etapa_execucoes_total", 1, "Execuções por etapa", etapa=etapa, status=status)
+        registrar_evento("etapa", etapa=etapa, status=status, wall_s=round(wall, 6), cpu_thread_s=round(cpu, 6))
+
+
+def normalizar_endpoint(url):
+    """'/api/v2/proposicoes/123/autores' -> '/proposicoes/{id}/autores' (rótulo de baixa cardinalidade)."""
+    caminho = urlparse(url).path
+    caminho = re.sub(r"^/api/v\d+", "", caminho)
+    return re.sub(r"/\d+(?=/|\.json$|$)", "/{id}", caminho) or "/"
+
+
+def instrumentar_sessao(session):
+    """Mede latência, status e erros de todas as requisições de uma requests.Session."""
+    requisitar = session.request
+
+    def request(method, url, *args, **kwargs):
+        endpoint = normalizar_endpoint(url)
+        inicio = time.perf_counter()
+        try:
+            resposta = requisitar(method, url, *args, **kwargs)
+        except Exception as e:
+            incrementar("oasis_http_erros_total", 1, "Erros HTTP por endpoint", endpoint=endpoint, tipo=type(e).__name__)
+            raise
+        observar("oasis_http_latencia_segundos", time.perf_counter() - inicio,
+                 "Latência das requisições HTTP", endpoint=endpoint)
+        incrementar("oasis_http_requisicoes_total", 1, "Requisições HTTP por endpoint e status",
+                    endpoint=endpoint, status=resposta.status_code)
+        if resposta.status_code >= 400:
+            incrementar("oasis_http_erros_total", 1, "Erros HTTP por endpoint", endpoint=endpoint,
+                        tipo=str(resposta.status_code))
+        return resposta
+
+    session.request = request
+    return session
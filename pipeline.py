@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import metricas
+
+# =============================================================================
+# EXECUTOR DE PIPELINE EM PROCESSO (DAG COM IMPRESSÕES DIGITAIS)
+# =============================================================================
+# Cada etapa declara:
+#   - dependencias: etapas que precisam terminar antes dela;
+#   - entradas: função que retorna um dict JSON com tudo que influencia o
+#     resultado (consulta, pesos, threshold, modelo, versão do corpus...);
+#   - saidas: arquivos produzidos (precisam existir para a etapa ser pulada).
+#
+# A impressão digital de uma etapa combina suas entradas com as impressões de
+# SAÍDA das dependências. Se nada mudou desde a última execução bem-sucedida,
+# a etapa é pulada. Etapas independentes rodam em paralelo.
+
+
+def hash_dados(dados):
+    texto = json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def impressao_arquivo(caminho):
+    """Versão barata de um arquivo: tamanho + data de modificação."""
+    if not os.path.exists(caminho):
+        return None
+    st = os.stat(caminho)
+    return {"arquivo": os.path.basename(caminho), "tamanho": st.st_size, "mtime": st.st_mtime_ns}
+
+
+def hash_conteudo_arquivo(caminho):
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class Etapa:
+    def __init__(self, nome, funcao, dependencias=(), entradas=None, saidas=()):
+        self.nome = nome
+        self.funcao = funcao
+        self.dependencias = list(dependencias)
+        self.entradas = entradas or (lambda: {})
+        self.saidas = list(saidas)
+
+    def impressao_saida(self, impressao_entrada, executada_em):
+        # Com arquivos de saída, a versão é o próprio arquivo; sem eles (ex.: banco),
+        # cada execução gera uma versão nova para forçar as etapas dependentes.
+        if self.saidas:
+            return hash_dados([impressao_arquivo(c) for c in self.saidas])
+        return hash_dados({"entrada": impressao_entrada, "executada_em": executada_em})
+
+
+class Pipeline:
+    def __init__(self, etapas, arquivo_estado, max_paralelo=4):
+        self.etapas = {e.nome: e for e in etapas}
+        self.arquivo_estado = arquivo_estado
+        self.max_paralelo = max_paralelo
+        self.relatorio = []
+
+        for etapa in etapas:
+            for dep in etapa.dependencias:
+                if dep not in self.etapas:
+                    raise ValueError(f"Etapa '{etapa.nome}' depende de etapa inexistente '{dep}'")
+
+    # --- Estado persistido ---
+    def carregar_estado(self):
+        if not os.path.exists(self.arquivo_estado):
+            return {}
+        try:
+            with open(self.arquivo_estado, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def salvar_estado(self, estado):
+        temporario = self.arquivo_estado + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(estado, f, indent=4, ensure_ascii=False)
+        os.replace(temporario, self.arquivo_estado)
+
+    # --- Execução ---
+    def calcular_impressao(self, etapa, saidas_deps):
+        return hash_dados({
+            "entradas": etapa.entradas(),
+            "dependencias": {dep: saidas_deps[dep] for dep in etapa.dependencias},
+        })
+
+    def pode_pular(self, etapa, impressao, estado):
+        anterior = estado.get(etapa.nome)
+        if not anterior or anterior.get("impressao_entrada") != impressao:
+            return False
+        return all(os.path.exists(c) for c in etapa.saidas)
+
+    def executar_etapa(self, etapa, impressao, estado, forcar):
+        inicio_wall = time.perf_counter()
+        inicio_cpu = time.thread_time()
+
+        if not forcar and self.pode_pular(etapa, impressao, estado):
+            registro = dict(estado[etapa.nome])
+            status = "pulada"
+            metricas.incrementar("oasis_etapa_puladas_total", 1, "Etapas puladas por impressão digital", etapa=etapa.nome)
+            metricas.registrar_evento("etapa", etapa=etapa.nome, status=status)
+        else:
+            print(f"\n>>> [PIPELINE] Executando etapa '{etapa.nome}'...", flush=True)
+            with metricas.medir_etapa(etapa.nome):
+                etapa.funcao()
+            executada_em = time.time()
+            registro = {
+                "impressao_entrada": impressao,
+                "impressao_saida": etapa.impressao_saida(impressao, executada_em),
+                "executada_em": executada_em,
+            }
+            status = "executada"
+
+        registro["ultima_duracao_s"] = round(time.perf_counter() - inicio_wall, 3)
+        self.relatorio.append({
+            "etapa": etapa.nome,
+            "status": status,
+            "wall_s": registro["ultima_duracao_s"],
+            "cpu_thread_s": round(time.thread_time() - inicio_cpu, 3),
+        })
+        return registro
+
+    def executar(self, forcar=False):
+        # Etapas em threads paralelas: um perfil por etapa misturaria o trabalho
+        # das outras, então OASIS_PERFILAR grava um perfil único do pipeline
+        if any(metricas.deve_perfilar(nome) for nome in ["pipeline", *self.etapas]):
+            with metricas.perfilar("pipeline"):
+                return self.executar_dag(forcar)
+        return self.executar_dag(forcar)
+
+    def executar_dag(self, forcar=False):
+        """Executa o DAG; etapas cujas dependências terminaram rodam em paralelo."""
+        estado = self.carregar_estado()
+        concluidas = {}  # nome -> impressao_saida
+        pendentes = dict(self.etapas)
+        em_execucao = {}
+        self.relatorio = []
+
+        with ThreadPoolExecutor(max_workers=self.max_paralelo) as executor:
+            while pendentes or em_execucao:
+                prontas = [e for e in pendentes.values() if all(d in concluidas for d in e.dependencias)]
+                for etapa in prontas:
+                    del pendentes[etapa.nome]
+                    impressao = self.calcular_impressao(etapa, concluidas)
+                    futuro = executor.submit(self.executar_etapa, etapa, impressao, estado, forcar)
+                    em_execucao[futuro] = etapa
+
+                if not em_execucao:
+                    raise RuntimeError(f"Dependências circulares entre as etapas: {', '.join(pendentes)}")
+
+                feitos, _ = wait(list(em_execucao), return_when=FIRST_COMPLETED)
+                for futuro in feitos:
+                    etapa = em_execucao.pop(futuro)
+                    registro = futuro.result()  # propaga exceções da etapa
+                    estado[etapa.nome] = registro
+                    concluidas[etapa.nome] = registro["impressao_saida"]
+                    self.salvar_estado(estado)
+
+        return self.relatorio
+
+    def imprimir_relatorio(self):
+        print("\n--- TEMPO POR ETAPA (CPU da thread da etapa, sem as threads de trabalho) ---")
+        for item in self.relatorio:
+            print(f" {item['etapa']:<12} {item['status']:<10} wall: {item['wall_s']:>8.2f}s  "
+                  f"cpu (thread): {item['cpu_thread_s']:>8.2f}s")